@@ -0,0 +1,99 @@
+# --- BATCHED ARMIES (struct-of-arrays) ---
+# Modo opcional: posiciones, tamaños, dirección, tier y flag de mini viven en
+# arrays de NumPy y el movimiento / límites / victorias se calculan en bloque.
+# Los objetos Soldier quedan como vistas para dibujar (sprite y nombre).
+import numpy as np
+
+
+class ArmyArrays:
+    FIELDS = (
+        ("x", np.int32),
+        ("y", np.int32),
+        ("w", np.int32),          # Ancho del rect (sprite de la cache)
+        ("size", np.int32),       # Tamaño "de combate" (Soldier.size)
+        ("direction", np.int8),
+        ("tier", np.int8),
+        ("mini", np.bool_),
+        ("alive", np.bool_),
+    )
+
+    def __init__(self, capacity=256):
+        self.n = 0
+        self.capacity = capacity
+        for name, dtype in self.FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype))
+
+    def __len__(self):
+        return self.n
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, dtype in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(self.capacity, dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def append(self, soldier):
+        if self.n == self.capacity:
+            self._grow()
+        i = self.n
+        self.x[i] = soldier.rect.x
+        self.y[i] = soldier.rect.y
+        self.w[i] = soldier.rect.width
+        self.size[i] = soldier.size
+        self.direction[i] = soldier.direction
+        self.tier[i] = soldier.tier
+        self.mini[i] = soldier.is_mini
+        self.alive[i] = True
+        soldier.slot = i
+        self.n += 1
+
+    def update(self, soldier):
+        """Vuelve a copiar posición y stats de un soldado que creció (GameState.grow_soldier)."""
+        i = soldier.slot
+        self.x[i] = soldier.rect.x
+        self.y[i] = soldier.rect.y
+        self.w[i] = soldier.rect.width
+        self.size[i] = soldier.size
+        self.tier[i] = soldier.tier
+
+    def clear(self):
+        self.n = 0
+
+    def move(self, speed):
+        n = self.n
+        self.x[:n] += speed * self.direction[:n]
+
+    def boxes(self):
+        """(left, top, right, bottom) por soldado, sin tocar los Rect."""
+        n = self.n
+        x, y, w = self.x[:n], self.y[:n], self.w[:n]
+        return list(zip(x.tolist(), y.tolist(), (x + w).tolist(), (y + w).tolist()))
+
+    def past_right(self, limit):
+        n = self.n
+        return np.flatnonzero(self.alive[:n] & (self.x[:n] > limit)).tolist()
+
+    def past_left(self):
+        # Igual que el chequeo por objeto: rect.x < -size
+        n = self.n
+        return np.flatnonzero(self.alive[:n] & (self.x[:n] < -self.size[:n])).tolist()
+
+    def compact(self, soldiers):
+        """Elimina los muertos y devuelve la lista de soldados alineada."""
+        n = self.n
+        keep = self.alive[:n].copy()
+        kept = int(keep.sum())
+        for name, _ in self.FIELDS:
+            arr = getattr(self, name)
+            arr[:kept] = arr[:n][keep]
+        self.n = kept
+        survivors = [s for s, k in zip(soldiers, keep.tolist()) if k]
+        for i, s in enumerate(survivors):
+            s.slot = i
+        return survivors
+
+    def sync_rects(self, soldiers):
+        for s, x in zip(soldiers, self.x[:self.n].tolist()):
+            s.rect.x = x
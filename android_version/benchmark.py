@@ -0,0 +1,200 @@
+# --- BENCHMARK ---
+# Reproduce trazas sintéticas de eventos (tormentas de likes, ballenas de
+# regalos, avalanchas de joins) contra un GameState headless con seed fija y
+# mide frames/seg, p50/p99 del tiempo de frame y pico de memoria: RSS del
+# proceso (incluye superficies y píxeles de SDL) y, aparte, el heap de Python.
+#
+#   python benchmark.py                      # todas las trazas
+#   python benchmark.py like_storm --frames 900 --batched
+#   python benchmark.py --dirty-rects        # render por rectángulos sucios
+#   python benchmark.py --export /tmp/f.raw  # coste de exportar frames (frame_export)
+#   python benchmark.py --json bench.json    # guardar resultados
+#   python benchmark.py --baseline bench.json --tolerance 0.2  # falla si empeora
+#   python benchmark.py --session sessions/session_X.jsonl    # tráfico real grabado
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+from config import TARGET_FPS
+from event_queue import EventQueue
+from game_engine import GameState
+from session_recorder import load_session
+
+USERS = [f"bench_user{i}" for i in range(200)]
+
+
+# --- TRAZAS ---
+# Cada traza es una lista de frames; cada frame, una lista de eventos:
+#   ("join", user) / ("like", user, count) / ("gift", user, gift_name)
+def like_storm(rng, frames):
+    trace = []
+    for f in range(frames):
+        burst = 40 if (f // 90) % 2 == 0 else 5 # Oleadas de 3s
+        trace.append([("like", rng.choice(USERS), rng.randint(5, 30)) for _ in range(burst)])
+    return trace
+
+def gift_whale(rng, frames):
+    gifts = ["Rose", "GG", "Hand Heart", "Confetti", "Money Gun", "Corgi", "Train", "Gem Gun"]
+    trace = []
+    for f in range(frames):
+        events = [("gift", "bench_whale", rng.choice(gifts)) for _ in range(rng.randint(0, 4))]
+        if f % 15 == 0:
+            events.append(("gift", rng.choice(USERS), "Rose"))
+        trace.append(events)
+    return trace
+
+def join_flood(rng, frames):
+    return [[("join", rng.choice(USERS)) for _ in range(rng.randint(10, 40))] for _ in range(frames)]
+
+def mixed(rng, frames):
+    storm, whale, flood = like_storm(rng, frames), gift_whale(rng, frames), join_flood(rng, frames)
+    return [s[:10] + w + j[:5] for s, w, j in zip(storm, whale, flood)]
+
+def session_trace(path, fps=TARGET_FPS):
+    """Convierte una sesión grabada (session_recorder) en frames a `fps`."""
+    records = load_session(path)
+    frames = int(max((r.get("t", 0) for r in records), default=0) * fps) + 1
+    trace = [[] for _ in range(frames)]
+    for r in records:
+        frame = trace[int(r.get("t", 0) * fps)]
+        if r["type"] == "join":
+            frame.append(("join", r["user"]))
+        elif r["type"] == "like":
+            frame.append(("like", r["user"], r["likes"]))
+        elif r["type"] == "gift" and not (r.get("streakable") and not r.get("streak_end", True)):
+            frame.append(("gift", r["user"], r["name"]))
+    return trace
+
+TRACES = {
+    "like_storm": like_storm,
+    "gift_whale": gift_whale,
+    "join_flood": join_flood,
+    "mixed": mixed,
+}
+
+
+def replay(trace, seed, batched, dirty_rects=False, export=None):
+    game = GameState(batched_armies=batched, headless=True, seed=seed, dirty_rects=dirty_rects, export=export)
+    queue = EventQueue()
+    frame_times = []
+    peak_soldiers = 0
+    for events in trace:
+        start = time.perf_counter()
+        for event in events:
+            if event[0] == "join":
+                queue.push_join(event[1])
+            elif event[0] == "like":
+                queue.push_like(event[1], event[2])
+            else:
+                queue.push_gift(event[1], event[2])
+        game.run_frame(queue)
+        frame_times.append(time.perf_counter() - start)
+        peak_soldiers = max(peak_soldiers, len(game.red_army) + len(game.blue_army))
+    if game.exporter:
+        game.exporter.close()
+    return frame_times, peak_soldiers
+
+def peak_rss_mb():
+    """Pico de RSS del proceso (máximo histórico: se acumula entre trazas), None si no se puede medir."""
+    if resource is None: return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB, macOS en bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run_trace(name, frames, seed, batched, measure_memory=True, trace=None, dirty_rects=False, export=None):
+    if trace is None:
+        trace = TRACES[name](random.Random(seed), frames)
+    frames = len(trace)
+    frame_times, peak_soldiers = replay(trace, seed, batched, dirty_rects, export)
+    total = sum(frame_times)
+    result = {
+        "trace": name,
+        "frames": frames,
+        "batched": batched,
+        "fps": round(frames / total, 1) if total else 0.0,
+        "p50_ms": round(percentile(frame_times, 50) * 1000, 3),
+        "p99_ms": round(percentile(frame_times, 99) * 1000, 3),
+        "max_ms": round(max(frame_times) * 1000, 3),
+        "peak_soldiers": peak_soldiers,
+    }
+    rss = peak_rss_mb()
+    if rss is not None:
+        result["peak_rss_mb"] = rss
+    if measure_memory:
+        # Pasada aparte: tracemalloc distorsiona los tiempos. Solo ve el heap de
+        # Python, no la memoria de SDL (superficies, píxeles): eso lo da el RSS
+        tracemalloc.start()
+        replay(trace, seed, batched, dirty_rects)
+        result["py_heap_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        tracemalloc.stop()
+    return result
+
+def compare(results, baseline, tolerance):
+    """Lista de regresiones de p99 respecto a un JSON previo."""
+    previous = {(r["trace"], r["batched"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        old = previous.get((r["trace"], r["batched"]))
+        if old and r["p99_ms"] > old["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{r['trace']}: p99 {old['p99_ms']}ms -> {r['p99_ms']}ms")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark headless de GameState")
+    parser.add_argument("traces", nargs="*", help=f"Trazas a ejecutar: {', '.join(TRACES)} (todas por defecto)")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--batched", action="store_true", help="Usar el modo batched armies (NumPy)")
+    parser.add_argument("--dirty-rects", action="store_true", help="Usar el render por rectángulos sucios")
+    parser.add_argument("--export", help="Exportar los frames a este fichero raw (o \"ffmpeg\")")
+    parser.add_argument("--no-memory", action="store_true", help="Saltar la pasada con tracemalloc (heap de Python)")
+    parser.add_argument("--session", help="Reproducir una sesión grabada (JSONL) en vez de las trazas sintéticas")
+    parser.add_argument("--json", help="Guardar resultados en este fichero")
+    parser.add_argument("--baseline", help="JSON previo contra el que comparar el p99")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.traces if name not in TRACES]
+    if unknown:
+        parser.error(f"trazas desconocidas: {', '.join(unknown)}")
+
+    if args.session:
+        runs = [(os.path.basename(args.session), session_trace(args.session))]
+    else:
+        runs = [(name, None) for name in args.traces or list(TRACES)]
+
+    results = []
+    for name, trace in runs:
+        r = run_trace(name, args.frames, args.seed, args.batched, not args.no_memory, trace, args.dirty_rects, args.export)
+        results.append(r)
+        mem = f" rss={r['peak_rss_mb']}MB" if "peak_rss_mb" in r else ""
+        mem += f" heap_py={r['py_heap_mb']}MB" if "py_heap_mb" in r else ""
+        print(f"{name:<11} {r['fps']:>8} fps  p50={r['p50_ms']}ms  p99={r['p99_ms']}ms  "
+              f"max={r['max_ms']}ms  soldados={r['peak_soldiers']}{mem}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"❌ Regresión {line}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# --- COLLISION BROAD-PHASE ---
+# Rejilla uniforme (spatial hash) para no comparar cada rojo contra cada azul.
+# Los soldados solo se mueven en X, así que una celda agrupa a los que pueden
+# chocar en el mismo carril y el coste por frame crece lineal con el ejército.
+from config import COLLISION_CELL_SIZE
+
+
+class SpatialHash:
+    def __init__(self, cell_size=COLLISION_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def clear(self):
+        self.cells.clear()
+
+    def _span(self, box):
+        # box = (left, top, right, bottom), como Rect pero sin objeto
+        cs = self.cell_size
+        left, top, right, bottom = box
+        return (range(left // cs, (right - 1) // cs + 1),
+                range(top // cs, (bottom - 1) // cs + 1))
+
+    def insert(self, index, box):
+        cols, rows = self._span(box)
+        cells = self.cells
+        for cx in cols:
+            for cy in rows:
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [index]
+                else:
+                    bucket.append(index)
+
+    def build(self, boxes):
+        self.clear()
+        for i, box in enumerate(boxes):
+            self.insert(i, box)
+
+    def query(self, box):
+        """Índices candidatos (ordenados) cuyas celdas se solapan con box."""
+        cols, rows = self._span(box)
+        cells = self.cells
+        found = set()
+        for cx in cols:
+            for cy in rows:
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return sorted(found)
+
+
+def rect_boxes(soldiers):
+    return [(r.left, r.top, r.right, r.bottom) for r in (s.rect for s in soldiers)]
+
+
+def boxes_overlap(a, b):
+    # Mismo criterio que Rect.colliderect
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
@@ -19,6 +19,109 @@ SPAWN_X_RANGE_BLUE = (WIDTH + 20, WIDTH + 100)
 # Spawn en la mitad inferior de la pantalla mayormente
 SPAWN_Y_RANGE = (300, HEIGHT - 300) 
 
+# Semilla del RNG del juego (None = aleatoria; fijarla hace la partida reproducible)
+RNG_SEED = None
+
+# Grabación de sesiones (eventos de TikTokLive a JSONL para reproducirlos luego)
+RECORD_SESSIONS = False
+SESSIONS_DIR = "sessions"
+
+# Frame rate objetivo (30 FPS para ahorrar batería en el móvil)
+TARGET_FPS = 30
+
+# Gobernador de calidad: baja/sube detalle según el tiempo de frame medido
+QUALITY_GOVERNOR = True        # Solo con pantalla (headless/benchmarks: fijo en calidad máxima)
+QUALITY_WINDOW = 60            # Frames que se miran antes de decidir (~2s a 30 FPS)
+QUALITY_DOWNGRADE_AT = 0.9     # p90 del frame > 90% del presupuesto -> bajar un nivel
+QUALITY_UPGRADE_AT = 0.5       # p90 < 50% del presupuesto del nivel superior -> subir
+
+# Simulación a paso fijo: movimiento/colisiones/victorias van a SIM_TICK_RATE
+# aunque el render vaya más lento (SPEED son píxeles por tick); el dibujo interpola.
+FIXED_TIMESTEP = True          # Solo con pantalla (headless: un tick por frame, reproducible)
+SIM_TICK_RATE = 30             # Ticks por segundo
+SIM_MAX_TICKS_PER_FRAME = 4    # Tope de ticks de recuperación por frame (el resto se pierde)
+
+# Exportar frames a un encoder en vez de capturar la ventana con OBS
+# None = ventana normal; "ffmpeg" = stdin de ffmpeg; cualquier otra cadena = fichero raw
+FRAME_EXPORT = None
+FRAME_EXPORT_FFMPEG = "ffmpeg"
+# Salida de ffmpeg, p.ej. v4l2loopback (OBS lo ve como webcam) o RTMP:
+#   ["-c:v", "libx264", "-preset", "veryfast", "-f", "flv", "rtmp://localhost/live/batalla"]
+FRAME_EXPORT_FFMPEG_OUTPUT = ["-pix_fmt", "yuv420p", "-f", "v4l2", "/dev/video10"]
+FRAME_EXPORT_BUFFERS = 4       # Frames en vuelo; si se llenan se descarta (y se cuenta)
+
+# Render por rectángulos sucios: solo se borra y se sube a pantalla lo que cambió
+BACKGROUND_COLOR = (30, 30, 30)
+DIRTY_RECT_RENDERING = False   # False = fill + flip de toda la pantalla cada frame
+DIRTY_RECT_MAX = 400           # Con más rects que esto sale más barato un flip completo
+
+# Fondo de nebulosa (assets/nebula_index.png, horneado con generate_noise.py)
+NEBULA_BACKGROUND = True
+NEBULA_COLOR = (110, 80, 170)  # Tinte sin equipo dominante
+NEBULA_INTENSITY = 0.45        # Cuánto se acerca al tinte en las zonas más densas
+NEBULA_SCROLL_SPEED = 0.5      # Píxeles por frame (scroll vertical)
+NEBULA_CYCLE_STEPS = 32        # Paletas por ciclo de color
+NEBULA_CYCLE_FRAMES = 8        # Frames entre paleta y paleta
+NEBULA_DOMINANCE = 1.3         # Un equipo domina si tiene 1.3x soldados que el otro
+
+# Partículas (textos flotantes + efectos): slots preasignados, si se llenan se descartan
+PARTICLE_MAX = 2048
+PARTICLE_SURFACES_MAX = 256    # Superficies distintas (textos "+N" y puntos); los textos sin uso se reciclan
+PARTICLE_GIFT_MAX = 40         # Confeti por regalo (escala con los puntos)
+PARTICLE_VICTORY = 12          # Chispas por soldado que cruza la pantalla
+PARTICLE_RESET = 300           # Explosión de GALAXY RESET
+
+# Audio: los sonidos sintetizados se guardan en disco (se regeneran si faltan)
+SOUND_CACHE_DIR = "sound_cache" # Relativo a game_engine.py
+
+# Audio: presupuesto de canales y límites por sonido
+SOUND_CHANNELS = 6             # Voces simultáneas como máximo
+SOUND_BASE_VOLUME = 0.6        # Volumen de un disparo suelto (las ráfagas suben hasta 1.0)
+# nombre -> (cooldown en ms, máximo de reproducciones por segundo, prioridad)
+# Con prioridad alta (>= 2) se roba un canal si no hay libres; el resto se descarta.
+SOUND_RULES = {
+    "pop":  (120, 6, 0),
+    "tick": (150, 4, 0),
+    "join": (200, 4, 1),
+    "gift": (100, 8, 2),
+    "win":  (250, 4, 2),
+}
+
+# LOD de minis (likes): por encima del umbral se agrupan en escuadras con contador
+SQUAD_THRESHOLD = 120          # Minis sueltos por equipo antes de empezar a agrupar
+SQUAD_MAX = 50                 # Minis por escuadra como máximo
+SQUAD_JOIN_DISTANCE = 150      # Píxeles desde el spawn en los que una escuadra admite reclutas
+
+# Ingesta en otro proceso (TikTokLive decodifica fuera del proceso que dibuja; --ingest-process)
+INGEST_PROCESS = False
+INGEST_BATCH_MS = 20           # El worker agrupa eventos y los envía cada N ms
+INGEST_BATCH_MAX = 256         # ... o antes si el lote llega a este tamaño
+
+# Multi-room: varios lives a la vez en el mismo event loop (--room usuario:EQUIPO[:peso])
+# team fija el equipo de todo lo que llega de esa sala (None = reglas normales) y
+# weight escala puntos de regalos y likes.
+# Ejemplo: ROOMS = [{"unique_id": "creador_a", "team": "RED"}, {"unique_id": "creador_b", "team": "BLUE"}]
+ROOMS = []
+ROOM_REORDER_MS = 50           # Ventana para ordenar por tiempo eventos de salas distintas
+ROOM_REPORT_INTERVAL = 10.0    # Segundos entre informes de eventos/s y lag por sala
+
+# Cola de eventos (TikTokLive -> juego), se drena una vez por frame
+EVENT_QUEUE_MAX = 500          # Joins/regalos pendientes antes de descartar
+LIKE_SPAWN_CAP = 20            # Máximo de minis por evento de like
+LIKE_BACKLOG_MAX = 1000        # Likes acumulados pendientes de spawnear
+SPAWN_BUDGET_PER_FRAME = 40    # Soldados nuevos como máximo en cada frame
+
+# Profiler de frames (overlay con la tecla P)
+PROFILE_OVERLAY = False        # Mostrar el overlay desde el arranque
+PROFILE_WINDOW = 300           # Frames en la ventana móvil (~10s a 30 FPS)
+PROFILE_EXPORT_PATH = None     # p.ej. "profile.json" o "profile.csv"
+PROFILE_EXPORT_INTERVAL = 10.0 # Segundos entre exportaciones
+
+# Cache de Sprites (superficies pre-escaladas compartidas entre soldados)
+SPRITE_SIZE_BUCKET = 4   # Redondeo de tamaños en px para reutilizar superficies
+SPRITE_CACHE_MAX = 64    # Entradas máximas antes de expulsar la menos usada (LRU)
+SOLDIER_ATLAS = "soldiers.atlas" # Generado por clean_assets.py (si falta se cargan los PNG)
+
 # Evolución
 TIER_2_THRESHOLD = 50
 TIER_3_THRESHOLD = 200
@@ -57,3 +160,20 @@ GIFT_MAP = {
     "Gem Gun": (500, "BLUE"),
     "Love U": (500, "RED")
 }
+
+# IDs de regalo de TikTok -> nombre en GIFT_MAP (opcional, el id gana al nombre)
+# Los ids que se resuelven por nombre durante el live se recuerdan solos.
+# Ejemplo: GIFT_ID_MAP = {5655: "Rose"}
+GIFT_ID_MAP = {}
+
+# Cache de textos renderizados (nombres, textos flotantes, log)
+TEXT_CACHE_MAX = 512
+
+# Pool de soldados (se reciclan en vez de crear/destruir en cada like)
+SOLDIER_POOL_MAX_FREE = 4000   # Soldados libres guardados como máximo
+
+# Colisiones (rejilla uniforme de broad-phase)
+COLLISION_CELL_SIZE = 128 # ~2 minis por celda; los soldados grandes ocupan varias
+
+# Modo "batched armies": posiciones/tamaños en arrays de NumPy (enjambres de likes)
+BATCHED_ARMIES = False
@@ -0,0 +1,148 @@
+# --- EVENT QUEUE ---
+# Los listeners de TikTokLive solo encolan; el game loop drena una vez por
+# frame con un presupuesto de spawns. Los likes se acumulan por usuario, los
+# regalos repetidos de un mismo combo se descartan y los sonidos de un mismo
+# drenado suenan una sola vez.
+from collections import deque, OrderedDict
+
+from config import EVENT_QUEUE_MAX, LIKE_SPAWN_CAP, LIKE_BACKLOG_MAX, SPAWN_BUDGET_PER_FRAME
+from gift_index import GiftIndex
+
+RED_LOG_COLOR = (255, 150, 150)
+BLUE_LOG_COLOR = (150, 150, 255)
+RESET_LOG_COLOR = (255, 0, 255)
+RECENT_GIFT_KEYS = 256 # Ventana de deduplicado de combos
+
+
+class EventQueue:
+    def __init__(self, max_events=EVENT_QUEUE_MAX, like_cap=LIKE_SPAWN_CAP,
+                 spawn_budget=SPAWN_BUDGET_PER_FRAME):
+        self.max_events = max_events
+        self.like_cap = like_cap
+        self.spawn_budget = spawn_budget
+        self.gifts = GiftIndex()
+        
+        self.events = deque()         # ("join", user, team, uid) / ("gift", user, gift_name, (points, team), uid)
+        self.likes = OrderedDict()    # (uid o user, team) -> minis pendientes (coalescidos); team None = al azar
+        self.pending_likes = 0
+        self._recent_gifts = OrderedDict()
+        
+        self.max_depth = 0
+        self.stats = dict.fromkeys(
+            ("received", "coalesced", "deduped", "dropped", "spawned", "deferred"), 0)
+
+    def depth(self):
+        return len(self.events) + self.pending_likes
+
+    def _track_depth(self):
+        depth = self.depth()
+        if depth > self.max_depth: self.max_depth = depth
+
+    def _push(self, record):
+        if len(self.events) >= self.max_events:
+            self.stats["dropped"] += 1
+            return False
+        self.events.append(record)
+        self._track_depth()
+        return True
+
+    # team fuerza el equipo (multi-room: cada sala alimenta a un equipo); None = reglas normales
+    # uid: unique_id de TikTok, identifica al espectador (user es solo el nick que se muestra)
+    def push_join(self, user, team=None, uid=None):
+        self.stats["received"] += 1
+        return self._push(("join", user, team, uid))
+
+    def push_like(self, user, count, team=None, uid=None):
+        self.stats["received"] += 1
+        count = min(int(count), self.like_cap)
+        room = LIKE_BACKLOG_MAX - self.pending_likes
+        if count > room:
+            self.stats["dropped"] += count - room
+            count = room
+        if count <= 0: return False
+        
+        key = (uid or user, team)
+        if key in self.likes:
+            self.likes[key] += count
+            self.stats["coalesced"] += 1
+        else:
+            self.likes[key] = count
+        self.pending_likes += count
+        self._track_depth()
+        return True
+
+    def push_gift(self, user, gift_name, streak_key=None, gift_id=None, team=None, weight=1.0, uid=None):
+        """Encola un regalo configurado. Devuelve (points, team) o None si no existe.
+
+        team/weight: la sala de origen fija el equipo y escala los puntos (RESET no cambia).
+        """
+        self.stats["received"] += 1
+        game_data = self.gifts.lookup(gift_name, gift_id)
+        if game_data is None: return None
+        if game_data[1] != "RESET" and (team is not None or weight != 1.0):
+            game_data = (max(1, int(round(game_data[0] * weight))), team or game_data[1])
+        
+        if streak_key is not None:
+            key = (uid or user, gift_name, streak_key)
+            if key in self._recent_gifts:
+                self.stats["deduped"] += 1
+                return game_data
+            self._recent_gifts[key] = True
+            if len(self._recent_gifts) > RECENT_GIFT_KEYS:
+                self._recent_gifts.popitem(last=False)
+        
+        self._push(("gift", user, gift_name, game_data, uid))
+        return game_data
+
+    def drain(self, game):
+        """Aplica eventos pendientes al GameState respetando el presupuesto de spawns."""
+        budget = self.spawn_budget
+        sounds = set()
+        
+        while self.events and budget > 0:
+            record = self.events.popleft()
+            if record[0] == "join":
+                _, user, team, uid = record
+                team = team or game.get_next_join_team()
+                game.spawn_soldier(team, user, 1, user_id=uid)
+                game.add_log(f"👋 {user} -> {team}", RED_LOG_COLOR if team == "RED" else BLUE_LOG_COLOR)
+                sounds.add("join")
+            else:
+                _, user, gift_name, (points, team), uid = record
+                if team == "RESET":
+                    game.add_log(f"🌌 GALAXY RESET!", RESET_LOG_COLOR)
+                else:
+                    game.add_log(f"🎁 {user}: {gift_name}", RED_LOG_COLOR if team == "RED" else BLUE_LOG_COLOR)
+                s = game.spawn_soldier(team, user, points, user_id=uid)
+                if s is not None: game.gift_burst(s, points)
+                sounds.add("gift")
+            budget -= 1
+            self.stats["spawned"] += 1
+        
+        # Likes en bloque, usuario por usuario; lo que no cabe espera al siguiente frame
+        while self.likes and budget > 0:
+            key, count = next(iter(self.likes.items()))
+            team = key[1]
+            n = min(count, budget)
+            for _ in range(n):
+                game.spawn_like_soldier(team)
+            if n == count:
+                del self.likes[key]
+            else:
+                self.likes[key] = count - n
+            self.pending_likes -= n
+            budget -= n
+            self.stats["spawned"] += n
+            sounds.add("tick")
+        
+        if self.events or self.likes:
+            self.stats["deferred"] += 1 # Backpressure: quedó trabajo para el próximo frame
+        
+        for name in sounds:
+            game.sound_manager.play(name)
+
+    def summary(self):
+        st = self.stats
+        return (f"cola={self.depth()} (máx {self.max_depth}) recibidos={st['received']} "
+                f"coalescidos={st['coalesced']} duplicados={st['deduped']} "
+                f"descartados={st['dropped']} spawns={st['spawned']} frames_con_retraso={st['deferred']}")
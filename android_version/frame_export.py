@@ -0,0 +1,107 @@
+# --- EXPORTACIÓN DE FRAMES ---
+# En vez de capturar la ventana con OBS, GameState dibuja en una superficie
+# offscreen y cada frame se copia (una sola memcpy desde get_view) a un anillo
+# de buffers preasignados. Un hilo escritor los vuelca a un sumidero: el stdin
+# de un ffmpeg local (RTMP, v4l2loopback, fichero...) o un fichero raw. Si el
+# escritor va atrasado y no quedan buffers libres, el frame se descarta y se
+# cuenta (nunca se bloquea el game loop).
+#
+#   FRAME_EXPORT = "ffmpeg"             # ffmpeg ... -i - FRAME_EXPORT_FFMPEG_OUTPUT
+#   FRAME_EXPORT = "frames.raw"         # rawvideo a fichero (tests / CI)
+# Con ffmpeg cada frame lleva la hora de llegada y la salida es a FPS constante
+# (duplica/descarta): ni el gobernador de calidad bajando los FPS ni los frames
+# descartados desplazan el stream respecto al reloj. El fichero raw no lleva
+# tiempos: es la secuencia de frames tal cual.
+#   ffplay -f rawvideo -pixel_format bgr0 -video_size 1080x1920 frames.raw
+import queue
+import subprocess
+import threading
+
+from config import FRAME_EXPORT_BUFFERS, FRAME_EXPORT_FFMPEG, FRAME_EXPORT_FFMPEG_OUTPUT
+
+
+def pix_fmt_for(surface):
+    """Formato de pixel de ffmpeg que coincide con la memoria de la superficie."""
+    r, g, b, a = surface.get_masks()
+    if surface.get_bytesize() != 4:
+        raise ValueError("Solo se exportan superficies de 32 bits")
+    alpha = "a" if a else "0"
+    if (r, g, b) == (0xff0000, 0xff00, 0xff):
+        return "bgr" + alpha
+    if (r, g, b) == (0xff, 0xff00, 0xff0000):
+        return "rgb" + alpha
+    raise ValueError(f"Máscaras de color no soportadas: {surface.get_masks()}")
+
+
+def open_sink(target, size, fps, pix_fmt):
+    """"ffmpeg" -> (stdin de ffmpeg, proceso); cualquier otra cosa -> (fichero raw, None)."""
+    if target == "ffmpeg":
+        # Entrada con timestamps de reloj de pared; salida CFR a fps (-vsync: vale de ffmpeg 4 a 7)
+        cmd = [FRAME_EXPORT_FFMPEG, "-loglevel", "warning", "-use_wallclock_as_timestamps", "1",
+               "-f", "rawvideo", "-pix_fmt", pix_fmt, "-s", f"{size[0]}x{size[1]}", "-i", "-",
+               "-vsync", "cfr", "-r", str(fps)] + list(FRAME_EXPORT_FFMPEG_OUTPUT)
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        return process.stdin, process
+    return open(target, "wb"), None
+
+
+class FrameExporter:
+    def __init__(self, target, surface, fps, buffers=FRAME_EXPORT_BUFFERS):
+        self.size = surface.get_size()
+        self.frame_bytes = surface.get_pitch() * self.size[1]
+        self.pix_fmt = pix_fmt_for(surface)
+        self.sink, self.process = open_sink(target, self.size, fps, self.pix_fmt)
+
+        # Anillo: buffers libres <-> buffers llenos pendientes de escribir
+        self._free = queue.Queue()
+        for _ in range(buffers):
+            self._free.put(bytearray(self.frame_bytes))
+        self._full = queue.Queue()
+        self.stats = {"pushed": 0, "written": 0, "dropped": 0, "errors": 0}
+        self.closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="frame-export", daemon=True)
+        self._writer.start()
+        print(f"📤 Exportando {self.size[0]}x{self.size[1]} {self.pix_fmt} a {target}")
+
+    def push(self, surface):
+        """Copia el frame a un buffer libre (no bloquea). False si se descartó."""
+        if self.closed: return False
+        self.stats["pushed"] += 1
+        try:
+            buf = self._free.get_nowait()
+        except queue.Empty:
+            self.stats["dropped"] += 1 # El escritor va atrasado
+            return False
+        view = surface.get_view("0")
+        memoryview(buf)[:] = memoryview(view).cast("B")
+        del view # Libera el lock de la superficie
+        self._full.put(buf)
+        return True
+
+    def _write_loop(self):
+        while True:
+            buf = self._full.get()
+            if buf is None: break
+            try:
+                self.sink.write(buf)
+                self.stats["written"] += 1
+            except (OSError, ValueError) as e:
+                # ffmpeg cerrado / disco lleno: se sigue descartando sin tumbar el juego
+                if not self.stats["errors"]:
+                    print(f"⚠️ Exportación de frames: {e}")
+                self.stats["errors"] += 1
+            self._free.put(buf)
+
+    def close(self):
+        if self.closed: return
+        self.closed = True
+        self._full.put(None)
+        self._writer.join(timeout=5)
+        try:
+            self.sink.close()
+        except OSError:
+            pass
+        if self.process is not None:
+            self.process.wait(timeout=5)
+        st = self.stats
+        print(f"📤 Exportación: {st['written']} frames escritos, {st['dropped']} descartados de {st['pushed']}")
@@ -0,0 +1,52 @@
+# --- FRAME SCHEDULER ---
+# Sustituye al clock.tick() bloqueante: espera al siguiente deadline de frame
+# con asyncio.sleep para que el cliente de TikTokLive siga recibiendo eventos
+# mientras el juego "duerme".
+import asyncio
+
+from config import TARGET_FPS
+
+
+class FrameScheduler:
+    def __init__(self, fps=TARGET_FPS, report_interval=5.0):
+        self.set_fps(fps)
+        self.report_interval = report_interval
+        self.next_deadline = None
+        self.frames = 0
+        self.dropped_frames = 0
+        self._dropped_since_report = 0
+        self._last_report = None
+
+    def set_fps(self, fps):
+        self.fps = fps
+        self.frame_time = 1.0 / fps
+
+    async def wait_next_frame(self):
+        """Duerme hasta el próximo frame. Devuelve cuántos frames se perdieron."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self.next_deadline is None:
+            self.next_deadline = now
+            self._last_report = now
+        self.next_deadline += self.frame_time
+        self.frames += 1
+
+        delay = self.next_deadline - now
+        dropped = 0
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            # Vamos tarde: no intentamos recuperar a ráfagas, re-anclamos el
+            # deadline y cedemos igualmente el control a la red.
+            dropped = int(-delay / self.frame_time) + 1
+            self.dropped_frames += dropped
+            self._dropped_since_report += dropped
+            self.next_deadline = now
+            await asyncio.sleep(0)
+
+        if self._dropped_since_report and now - self._last_report >= self.report_interval:
+            print(f"⚠️ Frames perdidos: {self._dropped_since_report} en {now - self._last_report:.1f}s "
+                  f"(objetivo {self.fps} FPS)")
+            self._dropped_since_report = 0
+            self._last_report = now
+        return dropped
@@ -1,8 +1,20 @@
+import os
+import json
 import pygame
 import random
-import numpy as np
-from PIL import Image, ImageDraw, ImageFont
+import math
+import hashlib
+from collections import OrderedDict, deque
 from config import *
+from collision import SpatialHash, rect_boxes, boxes_overlap
+from profiler import FrameProfiler
+from renderer import DirtyRectRenderer
+from quality import QualityGovernor
+from sim_clock import SimClock
+from frame_export import FrameExporter
+from nebula import NebulaBackground
+from particles import ParticleSystem
+from render_queue import RenderQueue, LAYER_SOLDIERS, LAYER_LABELS, LAYER_PARTICLES, LABEL_CULL_MARGIN
 
 # --- SOUND MANAGER ---
 class SoundManager:
@@ -16,13 +28,31 @@ class SoundManager:
             self.enabled = False
             return
 
+        # Presupuesto fijo de voces: el audio no puede crecer con el ritmo de eventos
+        pygame.mixer.set_num_channels(SOUND_CHANNELS)
+        self.pending = {}       # nombre -> veces pedido en este frame
+        self.last_played = {}   # nombre -> ms de la última reproducción
+        self.recent = {}        # nombre -> ms de reproducciones del último segundo
+        self.stats = dict.fromkeys(("played", "coalesced", "throttled", "no_channel"), 0)
+
         self.sounds = {}
         self.generate_sounds()
 
+    # nombre -> (frecuencia, duración, forma de onda, volumen)
+    SOUND_SPECS = {
+        "pop": (600, 0.05, "sine", 0.3),
+        "join": (880, 0.1, "sine", 0.4),
+        "gift": (523.25, 0.3, "sine", 0.4),
+        "win": (440, 0.5, "square", 0.5),
+        "tick": (0, 0.01, "noise", 0.1),
+    }
+
     def generate_sounds(self):
         if not self.enabled: return
         
         def make_sound(frequency, duration, wave_type="sine", volume=0.5):
+            # NumPy solo se importa si hay que sintetizar (cache vacía o parámetros nuevos)
+            import numpy as np
             sample_rate = 44100
             n_samples = int(sample_rate * duration)
             t = np.linspace(0, duration, n_samples, False)
@@ -42,125 +72,331 @@ class SoundManager:
             audio = (stereo * 32767).astype(np.int16)
             return pygame.sndarray.make_sound(audio)
 
-        try:
-            self.sounds["pop"] = make_sound(600, 0.05, "sine", 0.3)
-            self.sounds["join"] = make_sound(880, 0.1, "sine", 0.4)
-            self.sounds["gift"] = make_sound(523.25, 0.3, "sine", 0.4)
-            self.sounds["win"] = make_sound(440, 0.5, "square", 0.5)
-            self.sounds["tick"] = make_sound(0, 0.01, "noise", 0.1)
-        except Exception as e:
-            print(f"Error generating sounds: {e}")
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), SOUND_CACHE_DIR)
+        mixer_format = pygame.mixer.get_init() # (frecuencia, tamaño, canales)
+        
+        for name, spec in self.SOUND_SPECS.items():
+            key = hashlib.sha1(repr((spec, mixer_format)).encode()).hexdigest()[:16]
+            path = os.path.join(cache_dir, f"{name}_{key}.pcm")
+            try:
+                with open(path, "rb") as f:
+                    self.sounds[name] = pygame.mixer.Sound(buffer=f.read())
+                continue
+            except OSError:
+                pass # Cache miss: sintetizar
+            
+            try:
+                sound = make_sound(*spec)
+                self.sounds[name] = sound
+            except Exception as e:
+                print(f"Error generating sounds: {e}")
+                continue
+            
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(sound.get_raw())
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Warning: no se pudo guardar {name} en la cache de sonidos: {e}")
 
     def play(self, name):
+        # Solo se anota; flush() lo reproduce una vez por frame
         if self.enabled and name in self.sounds:
+            if name in self.pending:
+                self.pending[name] += 1
+                self.stats["coalesced"] += 1
+            else:
+                self.pending[name] = 1
+
+    def flush(self):
+        """Reproduce lo pedido en el frame: un disparo por sonido, más fuerte si se repitió."""
+        if not self.enabled or not self.pending: return
+        now = pygame.time.get_ticks()
+        
+        for name, count in self.pending.items():
+            cooldown, max_per_sec, priority = SOUND_RULES.get(name, (0, 10, 1))
+            if now - self.last_played.get(name, -cooldown) < cooldown:
+                self.stats["throttled"] += 1
+                continue
+            recent = self.recent.setdefault(name, deque())
+            while recent and now - recent[0] >= 1000:
+                recent.popleft()
+            if len(recent) >= max_per_sec:
+                self.stats["throttled"] += 1
+                continue
+            
+            channel = pygame.mixer.find_channel(priority >= 2)
+            if channel is None:
+                self.stats["no_channel"] += 1
+                continue
             try:
-                self.sounds[name].play()
+                channel.play(self.sounds[name])
+                # 1 disparo = volumen base; 2 = +25%, 4 = +50%... hasta 1.0
+                channel.set_volume(min(1.0, SOUND_BASE_VOLUME * (1 + 0.25 * math.log2(count))))
             except:
-                pass
+                continue
+            self.last_played[name] = now
+            recent.append(now)
+            self.stats["played"] += 1
+        self.pending.clear()
+
+# --- SOLDIER STATS ---
+def tier_for_power(power_level):
+    if power_level >= TIER_4_THRESHOLD:
+        return 4
+    elif power_level >= TIER_3_THRESHOLD:
+        return 3
+    elif power_level >= TIER_2_THRESHOLD:
+        return 2
+    return 1
+
+def size_for_power(power_level, tier):
+    scale_factor = 1.0 + (power_level * 0.05)
+    # Cap scale
+    max_scale_factor = 5.0 if tier == 4 else 3.0
+    return int(BASE_SIZE * min(scale_factor, max_scale_factor))
+
+def prewarm_powers():
+    """Poderes que seguro aparecen: los regalos configurados + minis de likes."""
+    return {1} | {points for points, team in GIFT_MAP.values() if team != "RESET"}
+
+def load_atlas(path):
+    """Carga un .atlas (JSON estilo Kivy: {página.png: {nombre: [x, y, w, h]}})."""
+    with open(path) as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(path)
+    sprites = {}
+    for page, entries in manifest.items():
+        sheet = pygame.image.load(os.path.join(base_dir, page)).convert_alpha()
+        for name, rect in entries.items():
+            sprites[name] = sheet.subsurface(pygame.Rect(rect))
+    return sprites
+
+# --- SPRITE CACHE ---
+class SpriteCache:
+    """Superficies pre-escaladas (y volteadas) compartidas entre soldados.
+
+    Clave: (team, tier, size_bucket, flipped). Escalar un PNG de 1024x1024 en
+    cada spawn era lo que tiraba frames en las oleadas de likes.
+    """
+    def __init__(self, assets, max_entries=SPRITE_CACHE_MAX):
+        self.assets = assets
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def bucket(size):
+        return max(SPRITE_SIZE_BUCKET, int(round(size / SPRITE_SIZE_BUCKET)) * SPRITE_SIZE_BUCKET)
+
+    def get(self, team, tier, size):
+        key = (team, tier, self.bucket(size), team == "RED")
+        surf = self._cache.get(key)
+        if surf is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = self._bake(*key)
+        self._cache[key] = surf
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return surf
+
+    def put(self, team, tier, size, surf):
+        """Mete una superficie ya horneada (p.ej. desde el atlas)."""
+        self._cache[(team, tier, self.bucket(size), team == "RED")] = surf
+
+    def _bake(self, team, tier, size, flipped):
+        images = self.assets.get(team, {})
+        base_img = images.get(tier, images.get(1))
+        try:
+            surf = pygame.transform.smoothscale(base_img, (size, size))
+        except:
+            surf = pygame.Surface((size, size))
+            surf.fill(RED_TEAM_COLOR if team == "RED" else BLUE_TEAM_COLOR)
+        if flipped:
+            surf = pygame.transform.flip(surf, True, False) # Voltear soldados rojos
+        return surf
+
+    def prewarm(self, powers):
+        """Hornea por adelantado los tamaños que sabemos que van a salir."""
+        for team in ("RED", "BLUE"):
+            for power in powers:
+                tier = tier_for_power(power)
+                self.get(team, tier, size_for_power(power, tier))
+
+    def __len__(self):
+        return len(self._cache)
+
+# --- TEXT CACHE ---
+class TextCache:
+    """LRU de superficies de texto ya renderizadas, clave (font, text, color).
+
+    font.render era lo más caro del frame con cientos de soldados con nombre.
+    """
+    def __init__(self, max_entries=TEXT_CACHE_MAX):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surf = self._cache.get(key)
+        if surf is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        try:
+            surf = font.render(text, True, color)
+        except:
+            surf = pygame.Surface((1, 1), pygame.SRCALPHA) # Glifos no soportados (emojis raros)
+        self._cache[key] = surf
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return surf
+
+    def __len__(self):
+        return len(self._cache)
+
+def short_name(username):
+    return username[:10] + ".." if len(username) > 12 else username
 
 # --- SOLDIER CLASS ---
 class Soldier:
-    def __init__(self, team, username, power_level, images):
+    # __slots__: sin __dict__ por instancia (menos memoria y GC con miles de minis)
+    __slots__ = ("team", "username", "power_level", "tier", "size", "image", "direction", "rect",
+                 "health", "name_surf", "user_id", "is_mini", "alive", "slot", "count")
+
+    def __init__(self, team, username, power_level, sprites, is_mini=False, rng=random):
+        self.rect = None
+        self.reset(team, username, power_level, sprites, is_mini, rng)
+
+    def reset(self, team, username, power_level, sprites, is_mini=False, rng=random):
+        """(Re)inicializa el soldado; SoldierPool lo usa para reciclar instancias."""
         self.team = team
         self.username = username
         self.power_level = power_level
-        self.images = images
-        
-        # Determinar Tier
-        if self.power_level >= TIER_4_THRESHOLD:
-            self.tier = 4
-        elif self.power_level >= TIER_3_THRESHOLD:
-            self.tier = 3
-        elif self.power_level >= TIER_2_THRESHOLD:
-            self.tier = 2
-        else:
-            self.tier = 1
-            
-        # Seleccionar imagen base
-        base_img = self.images.get(self.tier, self.images[1])
         
-        # Scaling Logic
-        scale_factor = 1.0 + (self.power_level * 0.05)
-        # Cap scale
-        max_scale_factor = 3.0
-        if self.tier == 4: max_scale_factor = 5.0
-        scale_factor = min(scale_factor, max_scale_factor)
+        # Determinar Tier y tamaño
+        self.tier = tier_for_power(self.power_level)
+        self.size = size_for_power(self.power_level, self.tier)
         
-        self.size = int(BASE_SIZE * scale_factor)
-        
-        try:
-            self.image = pygame.transform.scale(base_img, (self.size, self.size))
-        except:
-             self.image =  pygame.Surface((self.size, self.size))
-             self.image.fill(RED_TEAM_COLOR if team == "RED" else BLUE_TEAM_COLOR)
+        # Superficie compartida desde la cache (ya escalada y volteada)
+        self.image = sprites.get(self.team, self.tier, self.size)
 
         # Dirección
         if self.team == "RED":
             self.direction = 1
-            self.image = pygame.transform.flip(self.image, True, False) # Voltear soldados rojos
         else:
             self.direction = -1
-            
-        self.rect = self.image.get_rect()
+        
+        # Reutilizar el Rect si el soldado viene del pool
+        if self.rect is None:
+            self.rect = self.image.get_rect()
+        else:
+            self.rect.size = self.image.get_size()
         
         # Posición Inicial
         if self.team == "RED":
-            self.rect.x = random.randint(*SPAWN_X_RANGE_RED)
+            self.rect.x = rng.randint(*SPAWN_X_RANGE_RED)
         else:
-            self.rect.x = random.randint(*SPAWN_X_RANGE_BLUE)
+            self.rect.x = rng.randint(*SPAWN_X_RANGE_BLUE)
             
-        self.rect.y = random.randint(*SPAWN_Y_RANGE)
+        self.rect.y = rng.randint(*SPAWN_Y_RANGE)
         
         self.health = self.size * 2
-        self.floating_texts = []
-        self.is_mini = False
+        self.name_surf = None # Lo pre-renderiza GameState al spawnear
+        self.user_id = None # unique_id de TikTok (clave en soldiers_map; el nick no es único)
+        self.is_mini = is_mini
+        self.alive = True # Tombstone: se compacta una vez por frame
+        self.slot = -1 # Índice en ArmyArrays (modo batched)
+        self.count = 1 # Minis que representa (>1 = escuadra, ver GameState.spawn_like_soldier)
+        return self
 
-    def grow(self, points):
-        self.add_floating_text(f"+{points}", (0, 255, 0))
-
-    def add_floating_text(self, text, color):
-        if not hasattr(self, 'rect'): return
-        self.floating_texts.append([text, self.rect.centerx, self.rect.top, 60, color])
+    def grow(self, points, sprites):
+        """Suma poder (regalo repetido del mismo usuario). Devuelve True si sube de tier."""
+        old_tier = self.tier
+        self.update_stats(self.power_level + points, sprites)
+        return self.tier != old_tier
 
     def move(self):
         self.rect.x += SPEED * self.direction
 
-    def draw(self, screen, font, game_state=None):
-        screen.blit(self.image, self.rect)
-        
-        if self.is_mini: return
-        
-        # Username
-        try:
-            display_name = self.username[:10] + ".." if len(self.username) > 12 else self.username
-            text_surf = font.render(display_name, True, TEXT_COLOR)
-            screen.blit(text_surf, (self.rect.centerx - text_surf.get_width()//2, self.rect.top - 25))
-        except: pass
-        
-        # Floating Texts
-        for ft in self.floating_texts[:]:
-            txt, x, y, life, col = ft
-            alpha = min(255, int((life / 60) * 255))
-            if alpha <= 0:
-                self.floating_texts.remove(ft)
-                continue
-            
-            surf = font.render(str(txt), True, col)
-            surf.set_alpha(alpha)
-            screen.blit(surf, (x - surf.get_width()//2, y))
-            ft[2] -= 1 # Subir
-            ft[3] -= 1 # Decrementar vida
+    def update_stats(self, new_power, sprites):
+        # Re-tier + re-skin desde la cache; el rect crece alrededor del mismo centro
+        self.power_level = new_power
+        self.tier = tier_for_power(new_power)
+        self.size = size_for_power(new_power, self.tier)
+        self.image = sprites.get(self.team, self.tier, self.size)
+        center = self.rect.center
+        self.rect.size = self.image.get_size()
+        self.rect.center = center
+        self.health = self.size * 2
+
+# --- SOLDIER POOL ---
+class SoldierPool:
+    """Free list de Soldier: los muertos vuelven aquí y el próximo spawn los reutiliza."""
+    def __init__(self, max_free=SOLDIER_POOL_MAX_FREE):
+        self.max_free = max_free
+        self.free = []
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+        self.in_use = 0
+
+    def acquire(self, team, username, power_level, sprites, is_mini=False, rng=random):
+        self.in_use += 1
+        if self.free:
+            self.reused += 1
+            return self.free.pop().reset(team, username, power_level, sprites, is_mini, rng)
+        self.created += 1
+        return Soldier(team, username, power_level, sprites, is_mini, rng)
+
+    def release(self, soldier):
+        self.in_use -= 1
+        self.released += 1
+        if len(self.free) < self.max_free:
+            soldier.name_surf = None # No retener superficies de texto
+            self.free.append(soldier)
 
-    def update_stats(self, new_power):
-        pass # Simplificado para Android
+    def stats(self):
+        return {"in_use": self.in_use, "free": len(self.free), "created": self.created,
+                "reused": self.reused, "released": self.released}
 
 # --- GAME STATE ---
 class GameState:
-    def __init__(self):
+    def __init__(self, batched_armies=BATCHED_ARMIES, headless=False, seed=RNG_SEED,
+                 dirty_rects=DIRTY_RECT_RENDERING, adaptive_quality=None, fixed_timestep=None,
+                 export=FRAME_EXPORT, nebula=NEBULA_BACKGROUND):
+        # Headless: drivers dummy y render a una Surface (benchmarks, tests, CI)
+        # Export: también a una Surface offscreen, pero con audio y reloj reales
+        self.headless = headless
+        self.offscreen = headless or export is not None
+        if headless:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
         pygame.init()
-        # Fullscreen recomendado en Android
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN | pygame.HWSURFACE | pygame.DOUBLEBUF)
-        pygame.display.set_caption("TikTok Battle Android")
+        if headless:
+            pygame.display.set_mode((1, 1)) # Necesario para convert_alpha()
+            self.screen = pygame.Surface((WIDTH, HEIGHT))
+        elif self.offscreen:
+            pygame.display.set_mode((1, 1), pygame.HIDDEN) # Sin ventana visible que componer
+            self.screen = pygame.Surface((WIDTH, HEIGHT))
+        else:
+            # Fullscreen recomendado en Android
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN | pygame.HWSURFACE | pygame.DOUBLEBUF)
+            pygame.display.set_caption("TikTok Battle Android")
+        
+        # RNG propio: con seed la partida es reproducible
+        self.rng = random.Random(seed)
         
         self.sound_manager = SoundManager()
         
@@ -171,13 +407,55 @@ class GameState:
         except:
             self.font = pygame.font.SysFont("Arial", 24, bold=True)
             self.ui_font = pygame.font.SysFont("Arial", 40, bold=True)
+        self.text_cache = TextCache()
+        self._score = None
+        self._score_surf = None
+        self._score_rect = None
+        self._log_key = None
+        self._log_rects = []
+        self._quality_surf = None
+        self._quality_rect = None
+        # Render por rectángulos sucios (None = fill + flip completo)
+        self.renderer = DirtyRectRenderer(self.screen.get_size()) if dirty_rects else None
+        # Campo de batalla: se recoge, se recorta y se envía en un solo blits() por frame
+        self.render_queue = RenderQueue(self.screen.get_size())
+        # Frames a ffmpeg / fichero (ver frame_export)
+        self.exporter = FrameExporter(export, self.screen, TARGET_FPS) if export else None
             
-        self.clock = pygame.time.Clock()
-        
         self.red_army = []
         self.blue_army = []
         self.soldiers_map = {}
         self.activity_log = []
+        self.collision_grid = SpatialHash()
+        self.graveyard = [] # Muertos del frame: se compactan y vuelven al pool
+        # LOD de minis: cuántos hay sueltos por equipo y la escuadra que admite reclutas
+        self.mini_counts = {"RED": 0, "BLUE": 0}
+        self.open_squads = {"RED": None, "BLUE": None}
+        self.pool = SoldierPool()
+        self.profiler = FrameProfiler()
+        # Textos flotantes y efectos (regalos, victorias, reset) en un solo sistema de arrays
+        self.particles = ParticleSystem(PARTICLE_MAX, seed)
+        
+        # Calidad adaptativa (por defecto solo con pantalla: headless es reproducible)
+        if adaptive_quality is None:
+            adaptive_quality = QUALITY_GOVERNOR and not headless
+        self.governor = QualityGovernor() if adaptive_quality else None
+        self.show_floating_texts = True
+        self.show_names = True
+        self.effects = 1.0 # Factor de partículas de los efectos (0 = sin ráfagas)
+        self.squad_threshold = SQUAD_THRESHOLD
+        
+        # Paso fijo: la simulación no se ralentiza si el render va lento (headless = 1 tick/frame)
+        if fixed_timestep is None:
+            fixed_timestep = FIXED_TIMESTEP and not headless
+        self.sim_clock = SimClock() if fixed_timestep else None
+        
+        # Modo batched: arrays paralelos a red_army / blue_army
+        self.batched = batched_armies
+        if self.batched:
+            from army_arrays import ArmyArrays
+            self.red_arrays = ArmyArrays()
+            self.blue_arrays = ArmyArrays()
         
         self.red_victories = 0
         self.blue_victories = 0
@@ -186,13 +464,24 @@ class GameState:
         self.assets = {"RED": {}, "BLUE": {}}
         self._load_assets()
         
+        # Fondo animado (si falta el asset se queda el fill sólido)
+        self.frame = 0
+        self.nebula = None
+        self.nebula_tint = None
+        if nebula:
+            try:
+                self.nebula = NebulaBackground(os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets"))
+            except Exception as e:
+                print(f"Error loading nebula: {e}")
+        if self.nebula is not None and self.renderer is not None:
+            self.renderer.set_background(self.nebula.static())
+        
         self.running = True
         self.victory_timer = 0
         self.winning_team = None
 
     def _load_assets(self):
         # Base path relative to THIS file (game_engine.py)
-        import os
         base_path = os.path.dirname(os.path.abspath(__file__))
         
         def load(name, scale=1.0):
@@ -211,38 +500,177 @@ class GameState:
                 s.fill((255, 0, 255)) # Magenta debug
                 return s
         
-        # Paths relatives to where main.py runs
-        self.assets["RED"][4] = load("assets/red_soldier_t4.png", RED_TEAM_COLOR)
+        self.sprite_cache = SpriteCache(self.assets)
+        
+        # Camino rápido: atlas pre-escalado (una lectura de JSON + un PNG)
+        atlas_path = os.path.join(base_path, "assets", SOLDIER_ATLAS)
+        if os.path.exists(atlas_path):
+            try:
+                self._load_soldier_atlas(atlas_path)
+            except Exception as e:
+                print(f"Error loading {SOLDIER_ATLAS}: {e}")
+                self.assets = {"RED": {}, "BLUE": {}}
+                self.sprite_cache = SpriteCache(self.assets)
         
-        self.assets["BLUE"][1] = load("assets/blue_soldier.png", BLUE_TEAM_COLOR)
-        self.assets["BLUE"][2] = load("assets/blue_soldier_t2.png", BLUE_TEAM_COLOR)
-        self.assets["BLUE"][3] = load("assets/blue_soldier_t3.png", BLUE_TEAM_COLOR)
-        self.assets["BLUE"][4] = load("assets/blue_soldier_t4.png", BLUE_TEAM_COLOR)
+        if not self.assets["RED"]:
+            # Paths relatives to where main.py runs
+            self.assets["RED"][1] = load("red_soldier.png")
+            self.assets["RED"][2] = load("red_soldier_t2.png")
+            self.assets["RED"][3] = load("red_soldier_t3.png")
+            
+            self.assets["BLUE"][1] = load("blue_soldier.png")
+            self.assets["BLUE"][2] = load("blue_soldier_t2.png")
+            self.assets["BLUE"][3] = load("blue_soldier_t3.png")
+            
+            # Tier 4 (DIOS) es opcional: si no existe se usa el sprite de tier 3
+            for team, prefix in (("RED", "red"), ("BLUE", "blue")):
+                if os.path.exists(os.path.join(base_path, "assets", f"{prefix}_soldier_t4.png")):
+                    self.assets[team][4] = load(f"{prefix}_soldier_t4.png")
+                else:
+                    self.assets[team][4] = self.assets[team][3]
+        
+        # Pre-escalar los tamaños de los regalos configurados (+ minis de likes)
+        self.sprite_cache.prewarm(prewarm_powers())
+
+    def _load_soldier_atlas(self, path):
+        # Nombres: "RED/1/base" (master sin voltear) y "RED/1/64" (listo para usar)
+        for name, surf in load_atlas(path).items():
+            team, tier, size = name.split("/")
+            if size == "base":
+                self.assets[team][int(tier)] = surf
+            else:
+                self.sprite_cache.put(team, int(tier), int(size), surf)
 
-    def spawn_soldier(self, team, username, points):
+    def spawn_soldier(self, team, username, points, is_mini=False, user_id=None):
         if team == "RESET":
+            for s in self.red_army: self.pool.release(s)
+            for s in self.blue_army: self.pool.release(s)
+            self.graveyard.clear()
             self.red_army.clear()
             self.blue_army.clear()
+            if self.batched:
+                self.red_arrays.clear()
+                self.blue_arrays.clear()
             self.soldiers_map.clear()
+            self.mini_counts = {"RED": 0, "BLUE": 0}
+            self.open_squads = {"RED": None, "BLUE": None}
             self.red_victories = 0
             self.blue_victories = 0
+            self.galaxy_burst()
             return
 
         self.sound_manager.play("pop")
         
-        # Simplification: Only create new soldiers, don't grow distinct instances for now to save complexity
-        # Or simple logic:
-        images = self.assets[team]
-        s = Soldier(team, username, points, images)
-        if team == "RED": self.red_army.append(s)
-        else: self.blue_army.append(s)
+        # Un soldado por usuario y equipo: los regalos repetidos lo hacen crecer
+        # (por unique_id: los nicks se repiten y los que no tienen caen todos en "Unknown")
+        key = (team, user_id or username)
+        if not is_mini and username:
+            s = self.soldiers_map.get(key)
+            if s is not None:
+                self.grow_soldier(s, points)
+                return s
+        
+        s = self.pool.acquire(team, username, points, self.sprite_cache, is_mini, self.rng)
+        self.profiler.count("spawns")
+        if not is_mini and username:
+            s.name_surf = self.text_cache.render(self.font, short_name(username), TEXT_COLOR)
+            s.user_id = user_id
+            self.soldiers_map[key] = s
+        if is_mini:
+            self.mini_counts[team] += 1
+        if team == "RED":
+            self.red_army.append(s)
+            if self.batched: self.red_arrays.append(s)
+        else:
+            self.blue_army.append(s)
+            if self.batched: self.blue_arrays.append(s)
+        return s
         
-    def spawn_like_soldier(self):
+    def grow_soldier(self, s, points):
+        if self.batched:
+            # La posición buena está en los arrays; el rect solo se sincroniza al dibujar
+            arrays = self.red_arrays if s.team == "RED" else self.blue_arrays
+            s.rect.x = int(arrays.x[s.slot])
+            if s.grow(points, self.sprite_cache):
+                self.sound_manager.play("gift")
+            arrays.update(s)
+        elif s.grow(points, self.sprite_cache):
+            self.sound_manager.play("gift")
+        if self.show_floating_texts:
+            self.particles.emit_text(self.font, f"+{points}", (0, 255, 0), s.rect.centerx, s.rect.top)
+
+    # --- Efectos (ParticleSystem) ---
+    # Las cantidades escalan con self.effects (gobernador de calidad; en MÍNIMA no hay ráfagas)
+    def gift_burst(self, s, points):
+        """Confeti del color del equipo; más cuanto más vale el regalo."""
+        count = int(min(PARTICLE_GIFT_MAX, 6 + points // 10) * self.effects)
+        if not count: return
+        color = RED_TEAM_COLOR if s.team == "RED" else BLUE_TEAM_COLOR
+        self.particles.burst(s.rect.centerx, s.rect.centery, color, count)
+        if points >= 100:
+            self.particles.burst(s.rect.centerx, s.rect.centery, GOLD_COLOR, count // 2, speed=9.0)
+
+    def victory_burst(self, s):
+        count = int(PARTICLE_VICTORY * self.effects)
+        if not count: return
+        # El ganador ya está fuera de pantalla: la ráfaga sale del borde que cruzó
+        x = WIDTH if s.team == "RED" else 0
+        self.particles.burst(x, s.rect.centery, GOLD_COLOR, count, speed=8.0, life=40)
+
+    def galaxy_burst(self):
+        self.particles.clear()
+        count = int(PARTICLE_RESET * self.effects)
+        if not count: return
+        self.particles.burst(WIDTH // 2, HEIGHT // 2, NEBULA_COLOR, count, speed=18.0, life=60, gravity=0.0)
+        self.particles.burst(WIDTH // 2, HEIGHT // 2, TEXT_COLOR, count // 3, speed=24.0, life=45, gravity=0.0, radius=3)
+
+    def spawn_like_soldier(self, team=None):
         # Random team for likes or alternating? Let's do random for chaos
-        team = "RED" if random.random() > 0.5 else "BLUE"
-        self.spawn_soldier(team, "", 1)
-        self.red_army[-1].is_mini = True if team == "RED" else False
-        if team == "BLUE": self.blue_army[-1].is_mini = True
+        # (multi-room: la sala de origen fija el equipo)
+        if team is None:
+            team = "RED" if self.rng.random() > 0.5 else "BLUE"
+        
+        # LOD: con demasiados minis en pantalla el like se suma a una escuadra
+        squad = self._open_squad(team)
+        if squad is not None:
+            self.sound_manager.play("pop")
+            squad.count += 1
+            self._update_badge(squad)
+            self.profiler.count("spawns")
+            return squad
+        
+        s = self.spawn_soldier(team, "", 1, is_mini=True)
+        if self.mini_counts[team] > self.squad_threshold:
+            self.open_squads[team] = s # Semilla de una escuadra nueva
+        return s
+
+    def _open_squad(self, team):
+        if self.mini_counts[team] <= self.squad_threshold: return None
+        squad = self.open_squads[team]
+        if squad is None or squad.count >= SQUAD_MAX: return None
+        # Solo recluta mientras sigue cerca del spawn
+        if team == "RED":
+            if squad.rect.x > SPAWN_X_RANGE_RED[1] + SQUAD_JOIN_DISTANCE: return None
+        elif squad.rect.x < SPAWN_X_RANGE_BLUE[0] - SQUAD_JOIN_DISTANCE: return None
+        return squad
+
+    def _update_badge(self, squad):
+        # El contador de la escuadra ocupa el sitio del nombre
+        if squad.count > 1:
+            squad.name_surf = self.text_cache.render(self.font, f"x{squad.count}", GOLD_COLOR)
+        else:
+            squad.name_surf = None
+
+    def _wound(self, soldier, losses):
+        """Quita `losses` miembros; True si el soldado (o la escuadra entera) muere."""
+        if losses >= soldier.count:
+            self.kill(soldier)
+            return True
+        if losses:
+            soldier.count -= losses
+            self.profiler.count("removals", losses)
+            self._update_badge(soldier)
+        return False
 
     def get_next_join_team(self):
         return "RED" if len(self.red_army) <= len(self.blue_army) else "BLUE"
@@ -251,58 +679,286 @@ class GameState:
         self.activity_log.insert(0, (msg, color, 120)) # 120 frames
         if len(self.activity_log) > 5: self.activity_log.pop()
 
-    def run_frame(self):
-        self.screen.fill((30, 30, 30)) # Dark background
+    def kill(self, soldier):
+        # Tombstone: marcar como muerto, se saca de la lista en compact_armies
+        soldier.alive = False
+        self.graveyard.append(soldier)
+        self.profiler.count("removals", soldier.count)
+        key = (soldier.team, soldier.user_id or soldier.username)
+        if self.soldiers_map.get(key) is soldier:
+            del self.soldiers_map[key] # El próximo regalo de ese usuario spawnea uno nuevo
+        if soldier.is_mini:
+            self.mini_counts[soldier.team] -= 1
+            if self.open_squads[soldier.team] is soldier:
+                self.open_squads[soldier.team] = None # Va a volver al pool
+        if self.batched:
+            arrays = self.red_arrays if soldier.team == "RED" else self.blue_arrays
+            arrays.alive[soldier.slot] = False
+
+    def move_armies(self):
+        if self.batched:
+            self.red_arrays.move(SPEED)
+            self.blue_arrays.move(SPEED)
+            return
+        for s in self.red_army: s.move()
+        for s in self.blue_army: s.move()
+
+    def resolve_collisions(self):
+        if self.batched:
+            red_boxes = self.red_arrays.boxes()
+            blue_boxes = self.blue_arrays.boxes()
+        else:
+            red_boxes = rect_boxes(self.red_army)
+            blue_boxes = rect_boxes(self.blue_army)
         
-        # Draw Battlefield
-        for s in self.red_army[:]:
-            s.move()
-            s.draw(self.screen, self.font)
-            # Collision Logic (Simple)
-            for enemy in self.blue_army:
-                if s.rect.colliderect(enemy.rect):
-                    # Battle
-                    if s.size > enemy.size:
-                        if enemy in self.blue_army: self.blue_army.remove(enemy)
-                        # enemy.health -= s.power_level # complex logic skipped
-                    elif enemy.size > s.size:
-                        if s in self.red_army: self.red_army.remove(s)
-                        break # soldier dead
-                    else:
-                        # 50/50
-                        if random.random() > 0.5:
-                            if enemy in self.blue_army: self.blue_army.remove(enemy)
+        blue_army = self.blue_army
+        grid = self.collision_grid
+        grid.build(blue_boxes)
+        
+        for s, box in zip(self.red_army, red_boxes):
+            for j in grid.query(box):
+                enemy = blue_army[j]
+                if not enemy.alive or not boxes_overlap(box, blue_boxes[j]):
+                    continue
+                # Battle (count > 1 = escuadra: cada miembro pelea como un mini)
+                if s.size > enemy.size:
+                    self.kill(enemy)
+                    # enemy.health -= s.power_level # complex logic skipped
+                elif enemy.size > s.size:
+                    self.kill(s)
+                    break # soldier dead
+                else:
+                    # 50/50 por pareja hasta que un bando se queda sin miembros
+                    red_losses = blue_losses = 0
+                    while red_losses < s.count and blue_losses < enemy.count:
+                        if self.rng.random() > 0.5:
+                            blue_losses += 1
                         else:
-                            if s in self.red_army: self.red_army.remove(s)
-                            break
-            # Remove out of bounds
-            if s.rect.x > WIDTH: 
-                if s in self.red_army: 
-                    self.red_victories += 1
-                    self.sound_manager.play("win")
-                    self.red_army.remove(s)
-            
-        for s in self.blue_army[:]:
-            s.move()
-            s.draw(self.screen, self.font)
-            if s.rect.x < -s.size:
-                if s in self.blue_army:
-                    self.blue_victories += 1
-                    self.sound_manager.play("win")
-                    self.blue_army.remove(s)
-
-        # UI Overlay
-        # Scoreboard (Top Center)
-        score_text = f"{self.red_victories} - {self.blue_victories}"
-        surf = self.ui_font.render(score_text, True, (255, 255, 255))
-        self.screen.blit(surf, (WIDTH//2 - surf.get_width()//2, 50))
+                            red_losses += 1
+                    self._wound(enemy, blue_losses)
+                    if self._wound(s, red_losses):
+                        break
+
+    def check_victories(self):
+        # Remove out of bounds
+        if self.batched:
+            red_winners = [self.red_army[i] for i in self.red_arrays.past_right(WIDTH)]
+            blue_winners = [self.blue_army[i] for i in self.blue_arrays.past_left()]
+        else:
+            red_winners = [s for s in self.red_army if s.alive and s.rect.x > WIDTH]
+            blue_winners = [s for s in self.blue_army if s.alive and s.rect.x < -s.size]
+        
+        for s in red_winners:
+            self.red_victories += s.count
+            self.sound_manager.play("win")
+            self.victory_burst(s)
+            self.kill(s)
+        
+        for s in blue_winners:
+            self.blue_victories += s.count
+            self.sound_manager.play("win")
+            self.victory_burst(s)
+            self.kill(s)
+
+    def compact_armies(self):
+        if not self.graveyard: return
+        if self.batched:
+            self.red_army[:] = self.red_arrays.compact(self.red_army)
+            self.blue_army[:] = self.blue_arrays.compact(self.blue_army)
+        else:
+            self.red_army[:] = [s for s in self.red_army if s.alive]
+            self.blue_army[:] = [s for s in self.blue_army if s.alive]
+        # Ya fuera de las listas: devolverlos al pool
+        for s in self.graveyard:
+            self.pool.release(s)
+        self.graveyard.clear()
+
+    def _update_score_surf(self):
+        score = (self.red_victories, self.blue_victories)
+        if score != self._score:
+            self._score = score
+            self._score_surf = self.ui_font.render(f"{score[0]} - {score[1]}", True, (255, 255, 255))
+            return True
+        return False
+
+    def _invalidate_ui(self, renderer):
+        """Modo dirty: la UI se recompone cada frame pero solo se sube si cambia."""
+        old_rects = self._log_rects + [r for r in (self._score_rect, self._quality_rect) if r]
+        log_key = [(msg, color) for msg, color, timer in self.activity_log] + [self._quality_surf]
+        changed = self._update_score_surf() or log_key != self._log_key
+        self._log_key = log_key
+        renderer.restore(self.screen, old_rects, changed)
+        if changed:
+            # Zonas nuevas: se dibujan después, hay que subirlas igual
+            renderer.dirty.append(self._score_surf.get_rect(midtop=(WIDTH//2, 50)))
+            if self._quality_surf is not None:
+                renderer.dirty.append(self._quality_surf.get_rect(topright=(WIDTH - 20, 20)))
+            y = 100
+            for msg, color in log_key[:-1]:
+                renderer.dirty.append(self.text_cache.render(self.font, msg, color).get_rect(topleft=(20, y)))
+                y += 30
+
+    def dominant_team(self):
+        red, blue = len(self.red_army), len(self.blue_army)
+        if abs(red - blue) < 10: return None
+        if red > blue * NEBULA_DOMINANCE: return "RED"
+        if blue > red * NEBULA_DOMINANCE: return "BLUE"
+        return None
+
+    def _queue_army(self, army, arrays, dx):
+        """Sprites y nombres de un ejército a la RenderQueue, sin lo que cae fuera de pantalla.
+
+        dx: desplazamiento de interpolación entre ticks (SimClock).
+        """
+        rq = self.render_queue
+        names = self.show_names # False: sin nombres ni contadores (gobernador de calidad)
+        # Recorte en bloque: arrays en modo batched (sprites cuadrados: alto = w),
+        # collidelistall sobre los Rect en el normal
+        if arrays is not None:
+            n = arrays.n
+            x, w = arrays.x[:n] + dx, arrays.w[:n]
+            idx = rq.visible(x, w).tolist()
+            near = rq.visible(x, w, margin=LABEL_CULL_MARGIN, count=False).tolist() if names else ()
+        else:
+            rects = [s.rect for s in army]
+            idx = rq.visible_rects(rects, dx)
+            near = rq.visible_rects(rects, dx, LABEL_CULL_MARGIN, count=False) if names else ()
+
+        soldiers = [army[i] for i in idx]
+        rq.extend(LAYER_SOLDIERS, [(s.image, (s.rect.x + dx, s.rect.y)) for s in soldiers],
+                  [s.rect.bottom for s in soldiers])
+
+        # Username (pre-renderizado al spawnear) o contador de la escuadra
+        for i in near:
+            s = army[i]
+            surf = s.name_surf
+            if surf is not None:
+                rq.add(LAYER_LABELS, (surf, (s.rect.centerx + dx - surf.get_width() // 2, s.rect.top - 25)),
+                       s.rect.bottom)
+
+    def sim_tick(self):
+        """Un paso fijo de simulación: movimiento, colisiones y victorias."""
+        prof = self.profiler
+        self.move_armies()
+        prof.mark("movement")
+        self.resolve_collisions()
+        self.check_victories()
+        self.compact_armies()
+        prof.mark("collision")
+
+    def run_frame(self, events=None):
+        prof = self.profiler
+        prof.begin_frame()
+        
+        # Eventos de TikTok encolados (ver event_queue.EventQueue)
+        if events is not None:
+            events.drain(self)
+            prof.gauge("queue_depth", events.depth())
+        prof.mark("events")
+        
+        # Simulación: 0..N ticks fijos según el tiempo real transcurrido
+        ticks = self.sim_clock.advance() if self.sim_clock else 1
+        for _ in range(ticks):
+            self.sim_tick()
+        prof.count("ticks", ticks)
+        
+        # Interpolación: los soldados se dibujan donde estaban (1 - alpha) de tick atrás
+        red_dx = blue_dx = 0
+        if self.sim_clock is not None:
+            lag = int(round(SPEED * (1.0 - self.sim_clock.alpha())))
+            red_dx, blue_dx = -lag, lag
+        
+        # Draw Battlefield
+        if self.batched:
+            # Los Soldier son solo vistas: copiar X para dibujar
+            self.red_arrays.sync_rects(self.red_army)
+            self.blue_arrays.sync_rects(self.blue_army)
+        # Recogida (sin dibujar): sprites, nombres y partículas a la RenderQueue
+        self._queue_army(self.red_army, self.red_arrays if self.batched else None, red_dx)
+        self._queue_army(self.blue_army, self.blue_arrays if self.batched else None, blue_dx)
+        prof.mark("queue")
+        # Partículas: avanzan al ritmo de la simulación (0..N ticks)
+        self.particles.update(ticks)
+        self.particles.queue(self.render_queue, LAYER_PARTICLES)
+        prof.mark("particles")
+        
+        renderer = self.renderer
+        dirty = None
+        if renderer is None:
+            if self.nebula is not None:
+                self.nebula.draw(self.screen, self.frame, self.dominant_team())
+            else:
+                self.screen.fill(BACKGROUND_COLOR) # Dark background
+        else:
+            # Fondo estático (no anima: obligaría a subir la pantalla entera), re-teñido al cambiar de dominio
+            tint = self.dominant_team()
+            if self.nebula is not None and tint != self.nebula_tint:
+                self.nebula_tint = tint
+                renderer.set_background(self.nebula.static(tint))
+            # Solo se restaura el fondo donde hubo algo el frame anterior
+            # (con la pantalla llena no se apuntan rects: va a ser un flip completo)
+            if renderer.begin(self.screen, len(self.render_queue)):
+                dirty = renderer.dirty
+                self._invalidate_ui(renderer)
+        # Un solo blits() ordenado por capa y profundidad
+        culled = self.render_queue.culled
+        self.render_queue.flush(self.screen, dirty)
+        prof.gauge("culled", culled)
+        prof.mark("draw")
+
+        # UI Overlay (se re-blitea cada frame; en modo dirty solo se sube si cambió)
+        # Scoreboard (Top Center) - solo se re-renderiza si cambia el marcador
+        self._update_score_surf()
+        self._score_rect = self.screen.blit(self._score_surf, (WIDTH//2 - self._score_surf.get_width()//2, 50))
         
         # Activity Log (Top Left)
         y = 100
+        log_rects = []
         for msg, color, timer in self.activity_log:
-            txt_surf = self.font.render(msg, True, color)
-            self.screen.blit(txt_surf, (20, y))
+            log_rects.append(self.screen.blit(self.text_cache.render(self.font, msg, color), (20, y)))
             y += 30
+        self._log_rects = log_rects
+        
+        # Nivel de calidad (Top Right)
+        if self._quality_surf is not None:
+            self._quality_rect = self.screen.blit(self._quality_surf, self._quality_surf.get_rect(topright=(WIDTH - 20, 20)))
+        
+        if prof.show_overlay:
+            overlay_rects = prof.draw_overlay(self.screen, self.font)
+            if dirty is not None: dirty.extend(overlay_rects)
+        prof.mark("ui")
             
-        pygame.display.flip()
-        self.clock.tick(30) # 30 FPS for mobile battery
+        if renderer is None:
+            if not self.offscreen:
+                pygame.display.flip()
+        else:
+            renderer.present(self.offscreen)
+        if self.exporter is not None:
+            self.exporter.push(self.screen)
+            prof.gauge("dropped_exports", self.exporter.stats["dropped"])
+        prof.mark("flip")
+        
+        self.sound_manager.flush()
+        prof.mark("audio")
+        # El ritmo de frames lo marca FrameScheduler (asyncio) en main.py
+        
+        prof.gauge("active", len(self.red_army) + len(self.blue_army))
+        prof.gauge("pool_free", len(self.pool.free))
+        prof.gauge("particles", len(self.particles))
+        prof.end_frame()
+        self.frame += 1
+        
+        if self.governor is not None:
+            if self.governor.observe(prof.last_frame_time(), events) or self._quality_surf is None:
+                self.apply_quality()
+
+    def apply_quality(self):
+        """Copia el nivel del gobernador (el FPS lo aplica main.py al FrameScheduler)."""
+        gov = self.governor
+        self.show_floating_texts = gov.floating_texts
+        self.show_names = gov.names
+        self.effects = gov.effects
+        self.squad_threshold = gov.squad_threshold
+        if self._quality_surf is not None:
+            self.add_log(f"⚙️ Calidad: {gov.name}", (200, 200, 200))
+        self._quality_surf = self.text_cache.render(self.font, f"Calidad: {gov.name}", (200, 200, 200))
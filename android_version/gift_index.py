@@ -0,0 +1,85 @@
+# --- GIFT INDEX ---
+# Índice compilado una sola vez a partir de GIFT_MAP:
+#   1. id de TikTok (GIFT_ID_MAP + ids aprendidos en vivo)
+#   2. nombre exacto (sin mayúsculas)
+#   3. coincidencia más larga dentro del nombre (autómata Aho-Corasick), así
+#      "Hand Heart" gana a "Heart" sin depender del orden del dict.
+# Los nombres ya resueltos se memorizan.
+from config import GIFT_MAP, GIFT_ID_MAP
+
+MEMO_MAX = 1024
+
+
+class GiftIndex:
+    def __init__(self, gift_map=GIFT_MAP, gift_ids=GIFT_ID_MAP):
+        self.exact = {name.lower(): val for name, val in gift_map.items()}
+        self.by_id = {gift_id: self.exact[name.lower()] for gift_id, name in gift_ids.items()
+                      if name.lower() in self.exact}
+        self._memo = {}
+        self._build_automaton(self.exact)
+
+    def _build_automaton(self, patterns):
+        # Nodo = (transiciones, fail, patrón más largo que termina aquí)
+        self.goto = [{}]
+        self.fail = [0]
+        self.best = [None]
+        for pattern in patterns:
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.best.append(None)
+                node = nxt
+            self.best[node] = pattern
+        
+        # BFS para los enlaces de fallo; best hereda el sufijo si es más largo
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for ch, nxt in self.goto[node].items():
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0 # Hijos de la raíz fallan a la raíz
+                inherited = self.best[self.fail[nxt]]
+                if inherited and (self.best[nxt] is None or len(inherited) > len(self.best[nxt])):
+                    self.best[nxt] = inherited
+                queue.append(nxt)
+
+    def _longest_match(self, text):
+        goto, fail, best = self.goto, self.fail, self.best
+        node = 0
+        found = None
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            match = best[node]
+            if match and (found is None or len(match) > len(found)):
+                found = match
+        return found
+
+    def lookup(self, gift_name, gift_id=None):
+        """(points, team) del regalo o None si no está configurado."""
+        if gift_id is not None and gift_id in self.by_id:
+            return self.by_id[gift_id]
+        
+        key = gift_name.lower()
+        if key in self._memo:
+            result = self._memo[key]
+        else:
+            result = self.exact.get(key)
+            if result is None:
+                match = self._longest_match(key)
+                result = self.exact[match] if match else None
+            if len(self._memo) >= MEMO_MAX:
+                self._memo.clear()
+            self._memo[key] = result
+        
+        if result is not None and gift_id is not None:
+            self.by_id[gift_id] = result # Aprender el id para la próxima vez
+        return result
@@ -0,0 +1,233 @@
+# --- INGESTA EN OTRO PROCESO ---
+# Modo opcional: un proceso worker es dueño de TikTokLiveClient (websocket,
+# protobuf, objetos Gift/User) y manda al juego registros compactos por un
+# Pipe, en lotes. Así los picos de decodificación y los de render no se
+# bloquean entre sí por el GIL.
+#
+# Registro normalizado (tupla fija):
+#   (tipo, user, gift_name, gift_id, count, streak_key, uid)
+#   ("join", "ana", None, None, 1, None, "ana_88")
+#   ("like", "ana", None, None, 15, None, "ana_88")
+#   ("gift", "ana", "Rose", 5655, 1, 123, "ana_88")
+#   ("connect", "<unique_id>", None, None, 0, None, None) / ("disconnect", "", None, None, 0, None, None)
+# user es el nick que se muestra; uid el unique_id de TikTok (clave del soldado).
+# Los combos a medias (streakable sin streak_end) se filtran ya en el worker.
+#
+#   python main.py --ingest-process                      # live real
+#   python main.py --ingest-process --replay s.jsonl     # sesión grabada
+#   python ingest_worker.py --fake 500 --seconds 5       # productor local de prueba
+import asyncio
+import multiprocessing
+import random
+import sys
+import time
+
+from config import INGEST_BATCH_MS, INGEST_BATCH_MAX, GIFT_MAP, RECORD_SESSIONS
+from session_recorder import SessionRecorder, event_to_record, record_to_event, replay_session
+
+KINDS = ("gift", "connect", "disconnect", "join", "like")
+
+
+def compact_record(kind, event):
+    """Evento de TikTokLive -> registro normalizado (None si se ignora)."""
+    if kind == "disconnect":
+        return ("disconnect", "", None, None, 0, None, None)
+    r = event_to_record(kind, event)
+    if kind == "connect":
+        return ("connect", r["unique_id"], None, None, 0, None, None)
+    if kind == "join":
+        return ("join", r["user"], None, None, 1, None, r["uid"])
+    if kind == "like":
+        return ("like", r["user"], None, None, r["likes"], None, r["uid"])
+    if r["streakable"] and not r["streak_end"]:
+        return None
+    return ("gift", r["user"], r["name"], r["id"], 1, r["group_id"] or None, r["uid"])
+
+
+class _Batcher:
+    """Agrupa registros y los manda como (time.time(), [registros])."""
+    def __init__(self, conn, batch_ms=INGEST_BATCH_MS, batch_max=INGEST_BATCH_MAX):
+        self.conn = conn
+        self.interval = batch_ms / 1000
+        self.batch_max = batch_max
+        self.batch = []
+
+    def add(self, record):
+        self.batch.append(record)
+        if len(self.batch) >= self.batch_max:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            self.conn.send((time.time(), self.batch))
+            self.batch = []
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush()
+
+
+async def fake_source(handlers, rate=200, seconds=10.0, seed=0):
+    """Productor local: eventos sintéticos con la misma forma que los de TikTokLive."""
+    rng = random.Random(seed)
+    users = [f"fake_user{i}" for i in range(100)]
+    gifts = list(GIFT_MAP)
+    await handlers["connect"](record_to_event({"type": "connect", "unique_id": "fake"}))
+    start = time.monotonic()
+    sent = 0
+    while time.monotonic() - start < seconds:
+        due = int((time.monotonic() - start) * rate)
+        for _ in range(due - sent):
+            roll = rng.random()
+            if roll < 0.6:
+                record = {"type": "like", "user": rng.choice(users), "likes": rng.randint(1, 15)}
+            elif roll < 0.85:
+                record = {"type": "join", "user": rng.choice(users)}
+            else:
+                record = {"type": "gift", "user": rng.choice(users), "name": rng.choice(gifts), "id": None,
+                          "streakable": False, "streak_end": True, "group_id": None}
+            await handlers[record["type"]](record_to_event(record))
+        sent = max(sent, due)
+        await asyncio.sleep(0.005)
+    await handlers["disconnect"](None)
+
+
+async def _worker_main(conn, unique_id, replay_path, replay_speed, fake, record):
+    batcher = _Batcher(conn)
+
+    def forward(kind):
+        async def handler(event):
+            record = compact_record(kind, event)
+            if record is not None:
+                batcher.add(record)
+        return handler
+    handlers = {kind: forward(kind) for kind in KINDS}
+
+    flusher = asyncio.ensure_future(batcher.run())
+    try:
+        if fake:
+            await fake_source(handlers, **fake)
+        elif replay_path:
+            await replay_session(replay_path, handlers, replay_speed)
+        else:
+            from TikTokLive import TikTokLiveClient
+            from TikTokLive.events import GiftEvent, ConnectEvent, DisconnectEvent, JoinEvent, LikeEvent
+            client = TikTokLiveClient(unique_id=unique_id)
+            recorder = SessionRecorder() if record else None
+            for event_type, kind in ((GiftEvent, "gift"), (ConnectEvent, "connect"), (DisconnectEvent, "disconnect"),
+                                     (JoinEvent, "join"), (LikeEvent, "like")):
+                handler = handlers[kind]
+                if recorder and kind != "disconnect":
+                    handler = recorder.wrap(kind, handler)
+                client.add_listener(event_type, handler)
+            await client.start()
+    finally:
+        flusher.cancel()
+        batcher.flush()
+
+
+def run_worker(conn, unique_id=None, replay_path=None, replay_speed=1.0, fake=None, record=False):
+    """Punto de entrada del proceso worker. Al terminar manda None (fin del stream)."""
+    try:
+        asyncio.run(_worker_main(conn, unique_id, replay_path, replay_speed, fake, record))
+    except Exception as e:
+        print(f"❌ Worker de ingesta: {e}")
+    finally:
+        try:
+            conn.send(None)
+        except (OSError, EOFError):
+            pass
+        conn.close()
+
+
+class IngestChannel:
+    """Lado del juego: arranca el worker y vuelca sus registros en la EventQueue."""
+    def __init__(self, unique_id=None, replay_path=None, replay_speed=1.0, fake=None, record=RECORD_SESSIONS):
+        self.worker_kwargs = {"unique_id": unique_id, "replay_path": replay_path,
+                              "replay_speed": replay_speed, "fake": fake, "record": record}
+        self.process = None
+        self._conn = None
+        self.finished = False
+        self.stats = {"records": 0, "batches": 0, "lag_ms": 0.0, "max_lag_ms": 0.0}
+
+    def start(self):
+        # spawn, no fork: el padre ya puede tener hilos (SDL, mixer, exportador) y un fork
+        # con hilos no es seguro. El hijo solo importa este módulo y run_worker; los main.py
+        # crean el GameState dentro de __main__ y arrancan el worker antes que él.
+        ctx = multiprocessing.get_context("spawn")
+        receiver, sender = ctx.Pipe(duplex=False)
+        self._conn = receiver
+        self.process = ctx.Process(target=run_worker, args=(sender,), kwargs=self.worker_kwargs,
+                                   name="tiktok-ingest", daemon=True)
+        self.process.start()
+        sender.close() # El extremo de escritura solo lo usa el worker
+        return self
+
+    def pump(self, events, handlers=None):
+        """Vuelca los lotes ya recibidos (no bloquea). connect/disconnect van a handlers."""
+        while not self.finished and self._conn.poll():
+            try:
+                item = self._conn.recv()
+            except EOFError:
+                item = None
+            if item is None:
+                self.finished = True
+                break
+            sent_at, records = item
+            lag = (time.time() - sent_at) * 1000
+            self.stats["batches"] += 1
+            self.stats["records"] += len(records)
+            self.stats["lag_ms"] = round(lag, 2)
+            self.stats["max_lag_ms"] = round(max(self.stats["max_lag_ms"], lag), 2)
+            for kind, user, gift_name, gift_id, count, streak_key, uid in records:
+                if kind == "like":
+                    events.push_like(user, count, uid=uid)
+                elif kind == "join":
+                    events.push_join(user, uid=uid)
+                elif kind == "gift":
+                    events.push_gift(user, gift_name, streak_key, gift_id, uid=uid)
+                elif handlers and kind in handlers:
+                    # Los handlers de main.py son async: se lanzan sin esperar
+                    result = handlers[kind](record_to_event({"type": kind, "unique_id": user}))
+                    if asyncio.iscoroutine(result):
+                        asyncio.ensure_future(result)
+
+    async def feed(self, events, handlers=None):
+        """Corrutina para asyncio.gather(): bombea hasta que el worker termina."""
+        if self.process is None:
+            self.start()
+        while not self.finished:
+            self.pump(events, handlers)
+            await asyncio.sleep(INGEST_BATCH_MS / 1000)
+        print(f"⏹️ Ingesta terminada: {self.stats}")
+
+    def stop(self):
+        self.finished = True
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1)
+        if self._conn is not None:
+            self._conn.close()
+
+
+def main(argv=None):
+    """Prueba sin red: productor falso en otro proceso -> EventQueue local."""
+    import argparse
+    from event_queue import EventQueue
+    parser = argparse.ArgumentParser(description="Ingesta multiproceso con un productor local de prueba")
+    parser.add_argument("--fake", type=int, default=500, help="Eventos por segundo")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    async def run():
+        events = EventQueue()
+        channel = IngestChannel(fake={"rate": args.fake, "seconds": args.seconds}, record=False)
+        await channel.feed(events)
+        channel.stop()
+        print(f"📥 cola: {events.summary()}")
+    asyncio.run(run())
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,6 +13,8 @@ except:
 # Variables Globales (se llenarán dentro del try)
 game = None
 client = None
+channel = None # IngestChannel (modo --ingest-process)
+mux = None # RoomMux (varias salas: --room / --fake-rooms / config.ROOMS)
 TIKTOK_USER = "alkasstvsports"
 
 if __name__ == '__main__':
@@ -25,10 +27,24 @@ if __name__ == '__main__':
         from TikTokLive import TikTokLiveClient
         from TikTokLive.events import GiftEvent, ConnectEvent, DisconnectEvent, JoinEvent, LikeEvent
         from game_engine import GameState
-        from config import GIFT_MAP
+        from frame_scheduler import FrameScheduler
+        from event_queue import EventQueue
+        from session_recorder import SessionRecorder, replay_session, replay_args, user_key
+        from ingest_worker import IngestChannel
+        from rooms import RoomMux, room_args
+        from config import RECORD_SESSIONS, PROFILE_EXPORT_PATH, INGEST_PROCESS
 
+        replay_path, replay_speed = replay_args(sys.argv)
+        rooms, fake_rooms = room_args(sys.argv)
+        
+        # TikTokLive (o el replay) en otro proceso: se arranca ANTES que el GameState,
+        # que levanta los hilos de SDL, el mixer y el exportador
+        if not rooms and (INGEST_PROCESS or "--ingest-process" in sys.argv):
+            channel = IngestChannel(unique_id=TIKTOK_USER, replay_path=replay_path, replay_speed=replay_speed).start()
+        
         # 4. Inicializar Juego
         game = GameState()
+        events = EventQueue() # Los handlers encolan, el game loop drena
         
         # Definir handlers dentro del scope donde 'game' existe
         async def on_connect(event: ConnectEvent):
@@ -40,21 +56,13 @@ if __name__ == '__main__':
             game.add_log("❌ DESCONECTADO", (255, 0, 0))
 
         async def on_join(event: JoinEvent):
-            game.sound_manager.play("join")
             display_name = getattr(event.user, 'nick_name', None) or getattr(event.user, 'username', "Unknown")
-            team = game.get_next_join_team()
-            game.spawn_soldier(team, display_name, 1)
-            
-            color = (255, 150, 150) if team == "RED" else (150, 150, 255)
-            game.add_log(f"👋 {display_name} -> {team}", color)
+            events.push_join(display_name, uid=user_key(event))
 
         async def on_like(event: LikeEvent):
-            game.sound_manager.play("tick")
             like_count = getattr(event, 'likes', None) or getattr(event, 'total_likes', None) or getattr(event, 'count', 1) or 1
-            actual_count = min(int(like_count), 20) 
-            
-            for _ in range(actual_count):
-                game.spawn_like_soldier()
+            user_name = getattr(event.user, 'nick_name', None) or getattr(event.user, 'username', "Alguien")
+            events.push_like(user_name, like_count, uid=user_key(event))
 
         async def on_gift(event: GiftEvent):
             streak_end = getattr(event.gift, 'streak_end', True)
@@ -63,51 +71,72 @@ if __name__ == '__main__':
 
             gift_name = event.gift.name
             display_name = getattr(event.user, 'nick_name', None) or getattr(event.user, 'username', "Unknown")
-            
-            game_data = None
-            for key, val in GIFT_MAP.items():
-                if key.lower() in gift_name.lower():
-                    game_data = val
-                    break
-                    
-            if game_data:
-                game.sound_manager.play("gift")
-                points, team = game_data
-                
-                color = (255, 150, 150) if team == "RED" else (150, 150, 255)
-                if team == "RESET":
-                    game.add_log(f"🌌 GALAXY RESET!", (255, 0, 255))
-                else:
-                    game.add_log(f"🎁 {display_name}: {gift_name}", color)
-                    
-                game.spawn_soldier(team, display_name, points)
+            streak_key = getattr(event, 'group_id', None) or None
+            events.push_gift(display_name, gift_name, streak_key, getattr(event.gift, 'id', None), uid=user_key(event))
 
         async def game_loop():
             print("🎮 Iniciando motor gráfico...")
+            scheduler = FrameScheduler()
             while True:
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
                         if client and client.connected:
                             await client.disconnect()
+                        if channel:
+                            channel.stop()
+                        if mux:
+                            await mux.disconnect()
+                        if PROFILE_EXPORT_PATH:
+                            game.profiler.export(PROFILE_EXPORT_PATH)
+                        if game.exporter:
+                            game.exporter.close()
                         pygame.quit()
                         return
+                    if event.type == pygame.KEYDOWN and event.key == pygame.K_p: # P = Profiler overlay
+                        game.profiler.toggle_overlay()
                 
-                game.run_frame()
-                await asyncio.sleep(0.001)
+                game.run_frame(events) # Drena la cola de eventos y dibuja
+                if game.governor and scheduler.fps != game.governor.fps:
+                    scheduler.set_fps(game.governor.fps) # Calidad adaptativa: FPS objetivo
+                await scheduler.wait_next_frame() # Duerme en el event loop, no bloquea la red
+                game.profiler.gauge("dropped_frames", scheduler.dropped_frames)
 
-        # 5. Configurar Cliente
-        client = TikTokLiveClient(unique_id=TIKTOK_USER)
-        client.add_listener(GiftEvent, on_gift)
-        client.add_listener(ConnectEvent, on_connect)
-        client.add_listener(DisconnectEvent, on_disconnect)
-        client.add_listener(JoinEvent, on_join)
-        client.add_listener(LikeEvent, on_like)
+        # 5. Configurar Cliente (o reproducir una sesión grabada: --replay fichero.jsonl --speed 4)
+        handlers = {"gift": on_gift, "connect": on_connect, "disconnect": on_disconnect,
+                    "join": on_join, "like": on_like}
+        if rooms:
+            # Varias salas en este event loop, cada una con su equipo/peso
+            mux = RoomMux(rooms)
+            sources = mux.fake_sources(seconds=600) if fake_rooms else mux.live_sources()
+            source = mux.run(events, sources, game)
+        elif channel is not None:
+            # Los registros del worker llegan por un Pipe
+            source = channel.feed(events, handlers)
+        elif replay_path:
+            source = replay_session(replay_path, handlers, replay_speed)
+        else:
+            client = TikTokLiveClient(unique_id=TIKTOK_USER)
+            recorder = SessionRecorder() if RECORD_SESSIONS else None
+            if recorder:
+                print(f"⏺️ Grabando sesión en {recorder.path}")
+            for event_type, kind in ((GiftEvent, "gift"), (ConnectEvent, "connect"), (DisconnectEvent, "disconnect"),
+                                     (JoinEvent, "join"), (LikeEvent, "like")):
+                handler = handlers[kind]
+                if recorder and kind != "disconnect":
+                    handler = recorder.wrap(kind, handler)
+                client.add_listener(event_type, handler)
+            source = client.start()
         
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         
-        future = asyncio.gather(client.start(), game_loop())
-        loop.run_until_complete(future)
+        future = asyncio.gather(source, game_loop())
+        try:
+            loop.run_until_complete(future)
+        finally:
+            # También con Ctrl-C (exportando no hay ventana que cerrar): ffmpeg tiene que terminar su salida
+            if game.exporter:
+                game.exporter.close()
         
     except Exception as e:
         # 6. CRASH HANDLER ROBUSTO
@@ -0,0 +1,60 @@
+# --- FONDO DE NEBULOSA ---
+# La textura de ruido (8 bits indexada, teselable) se hornea offline con
+# generate_noise.py. Aquí solo se escala una vez y se anima sin trabajo por
+# píxel: scroll vertical con dos blits y ciclo de paleta (set_palette de 256
+# colores) teñido con el color del equipo que domina.
+import math
+import os
+
+import pygame
+
+from config import (WIDTH, HEIGHT, BACKGROUND_COLOR, RED_TEAM_COLOR, BLUE_TEAM_COLOR, NEBULA_COLOR,
+                    NEBULA_INTENSITY, NEBULA_SCROLL_SPEED, NEBULA_CYCLE_STEPS, NEBULA_CYCLE_FRAMES)
+
+NEBULA_ASSET = "nebula_index.png"
+TINTS = {None: NEBULA_COLOR, "RED": RED_TEAM_COLOR, "BLUE": BLUE_TEAM_COLOR}
+
+
+class NebulaBackground:
+    def __init__(self, assets_dir, size=(WIDTH, HEIGHT)):
+        index = pygame.image.load(os.path.join(assets_dir, NEBULA_ASSET))
+        if index.get_bitsize() != 8:
+            raise ValueError(f"{NEBULA_ASSET} debe ser de 8 bits indexado (generate_noise.py)")
+        self.tile = pygame.transform.scale(index, size) # scale (no smooth) conserva los 8 bits
+        self.height = size[1]
+        self._palettes = {}
+        self._current = None
+
+    def palette(self, tint, step):
+        """256 colores: fondo -> tinte según la densidad del ruido, con un brillo que ondula."""
+        key = (tint, step)
+        palette = self._palettes.get(key)
+        if palette is None:
+            color = TINTS[tint]
+            phase = step / NEBULA_CYCLE_STEPS
+            palette = []
+            for i in range(256):
+                density = i / 255
+                shimmer = 0.8 + 0.2 * math.sin(2 * math.pi * (density * 3 - phase))
+                mix = min(1.0, density * NEBULA_INTENSITY * shimmer)
+                palette.append(tuple(int(b + (c - b) * mix) for b, c in zip(BACKGROUND_COLOR, color)))
+            self._palettes[key] = palette
+        return palette
+
+    def _set(self, tint, step):
+        if self._current != (tint, step):
+            self._current = (tint, step)
+            self.tile.set_palette(self.palette(tint, step))
+
+    def draw(self, screen, frame, tint=None):
+        """Fondo animado: sustituye al fill de cada frame."""
+        self._set(tint, (frame // NEBULA_CYCLE_FRAMES) % NEBULA_CYCLE_STEPS)
+        offset = int(frame * NEBULA_SCROLL_SPEED) % self.height
+        screen.blit(self.tile, (0, -offset))
+        if offset:
+            screen.blit(self.tile, (0, self.height - offset))
+
+    def static(self, tint=None):
+        """Fotograma fijo a 32 bits (capa de fondo del render por rectángulos sucios)."""
+        self._set(tint, 0)
+        return self.tile.convert()
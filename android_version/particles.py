@@ -0,0 +1,214 @@
+# --- SISTEMA DE PARTÍCULAS ---
+# Un único sistema para todo el motor: textos flotantes (+N), ráfagas de
+# regalo, victorias y el reset de Galaxy. Cada partícula es un slot en arrays
+# preasignados (posición, velocidad, gravedad, vida, superficie); se actualizan
+# en bloque con NumPy y las que mueren se quitan con swap-remove (el último
+# slot vivo ocupa el hueco), sin listas por soldado ni re-render de texto.
+# El alpha se cuantiza en ALPHA_LEVELS variantes por superficie, creadas una vez.
+# El registro de superficies tiene tamaño fijo (PARTICLE_SURFACES_MAX): los textos
+# que ya no usa ninguna partícula viva se reciclan cuando se llena.
+import math
+
+import numpy as np
+import pygame
+
+from config import PARTICLE_MAX, PARTICLE_SURFACES_MAX
+
+ALPHA_LEVELS = 8
+
+
+class ParticleSystem:
+    FIELDS = (
+        ("x", np.float32),
+        ("y", np.float32),
+        ("vx", np.float32),
+        ("vy", np.float32),
+        ("ay", np.float32),      # Gravedad (px/frame²)
+        ("life", np.int16),      # Frames que le quedan
+        ("max_life", np.int16),
+        ("surf", np.int32),      # Índice en self.surfaces
+    )
+
+    def __init__(self, capacity=PARTICLE_MAX, seed=None, max_surfaces=PARTICLE_SURFACES_MAX):
+        self.capacity = capacity
+        self.n = 0
+        for name, dtype in self.FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype))
+        self.rng = np.random.default_rng(seed)
+        self.max_surfaces = max_surfaces
+        self.surfaces = []       # id -> [variante por nivel de alpha] + [original] (None = libre)
+        self._keys = []          # id -> clave
+        self._ids = {}           # clave -> id
+        self._free = []          # ids reciclables
+        self._sizes = np.zeros((max_surfaces, 2), np.int32) # id -> (ancho, alto), para recortar en bloque
+        self.stats = {"emitted": 0, "expired": 0, "dropped": 0, "recycled": 0}
+
+    def __len__(self):
+        return self.n
+
+    # --- Superficies ---
+    def surface_id(self, surf, key):
+        """Registra una superficie (una vez por clave) y devuelve su id; None si el registro está lleno."""
+        sid = self._ids.get(key)
+        if sid is not None: return sid
+        if not self._free and len(self.surfaces) >= self.max_surfaces:
+            self._recycle()
+        if self._free:
+            sid = self._free.pop()
+            self.surfaces[sid] = [None] * ALPHA_LEVELS + [surf]
+            self._keys[sid] = key
+        elif len(self.surfaces) < self.max_surfaces:
+            sid = len(self.surfaces)
+            self.surfaces.append([None] * ALPHA_LEVELS + [surf])
+            self._keys.append(key)
+        else:
+            return None # Todos en uso por partículas vivas
+        self._ids[key] = sid
+        self._sizes[sid] = surf.get_size()
+        return sid
+
+    def _recycle(self):
+        """Libera los textos que no usa ninguna partícula viva (los puntos son pocos y se quedan)."""
+        in_use = set(np.unique(self.surf[:self.n]).tolist())
+        for sid, key in enumerate(self._keys):
+            if key is not None and key[0] == "text" and sid not in in_use:
+                del self._ids[key]
+                self._keys[sid] = None
+                self.surfaces[sid] = None
+                self._free.append(sid)
+                self.stats["recycled"] += 1
+
+    def text_id(self, font, text, color):
+        key = ("text", font, text, color)
+        sid = self._ids.get(key)
+        if sid is None:
+            try:
+                surf = font.render(text, True, color)
+            except pygame.error:
+                return None
+            sid = self.surface_id(surf, key)
+        return sid
+
+    def dot_id(self, color, radius=4):
+        key = ("dot", color, radius)
+        sid = self._ids.get(key)
+        if sid is None:
+            # Colorkey + alpha de superficie con RLE: ~5x más rápido que un SRCALPHA con alpha
+            # (con miles de puntos en pantalla es lo que más cuesta de los efectos)
+            colorkey = (0, 0, 0) if color != (0, 0, 0) else (255, 0, 255)
+            surf = pygame.Surface((radius * 2, radius * 2))
+            surf.fill(colorkey)
+            pygame.draw.circle(surf, color, (radius, radius), radius)
+            surf.set_colorkey(colorkey, pygame.RLEACCEL)
+            sid = self.surface_id(surf, key)
+        return sid
+
+    def _variant(self, sid, level):
+        variants = self.surfaces[sid]
+        surf = variants[level]
+        if surf is None:
+            surf = variants[ALPHA_LEVELS].copy()
+            surf.set_alpha(int(255 * (level + 1) / ALPHA_LEVELS), pygame.RLEACCEL)
+            variants[level] = surf
+        return surf
+
+    # --- Emisión ---
+    def _reserve(self, count):
+        free = self.capacity - self.n
+        if count > free:
+            self.stats["dropped"] += count - free
+            count = free
+        start = self.n
+        self.n += count
+        self.stats["emitted"] += count
+        return start, start + count
+
+    def emit(self, sid, x, y, vx=0.0, vy=0.0, ay=0.0, life=60):
+        start, end = self._reserve(1)
+        if start == end: return
+        w = self.surfaces[sid][ALPHA_LEVELS].get_width()
+        self.x[start] = x - w // 2 # x es el centro
+        self.y[start] = y
+        self.vx[start] = vx
+        self.vy[start] = vy
+        self.ay[start] = ay
+        self.life[start] = self.max_life[start] = life
+        self.surf[start] = sid
+
+    def emit_text(self, font, text, color, x, y, life=60):
+        """Texto flotante ("+N"): sube 1 px por tick y se desvanece."""
+        sid = self.text_id(font, text, color)
+        if sid is None:
+            self.stats["dropped"] += 1
+            return
+        self.emit(sid, x, y, vy=-1.0, life=life)
+
+    def burst(self, x, y, color, count, speed=6.0, life=30, gravity=0.25, radius=4):
+        """Ráfaga radial de puntos (regalos, victorias)."""
+        sid = self.dot_id(color, radius)
+        if sid is None:
+            self.stats["dropped"] += count
+            return
+        start, end = self._reserve(count)
+        count = end - start
+        if not count: return
+        angle = self.rng.uniform(0, 2 * math.pi, count)
+        velocity = self.rng.uniform(0.3, 1.0, count) * speed
+        self.x[start:end] = x - radius
+        self.y[start:end] = y - radius
+        self.vx[start:end] = np.cos(angle) * velocity
+        self.vy[start:end] = np.sin(angle) * velocity
+        self.ay[start:end] = gravity
+        lives = self.rng.integers(life // 2, life + 1, count)
+        self.life[start:end] = lives
+        self.max_life[start:end] = lives
+        self.surf[start:end] = sid
+
+    def clear(self):
+        self.n = 0
+
+    # --- Actualización en bloque ---
+    def update(self, steps=1):
+        n = self.n
+        if not n: return
+        for _ in range(steps):
+            self.x[:n] += self.vx[:n]
+            self.y[:n] += self.vy[:n]
+            self.vy[:n] += self.ay[:n]
+        self.life[:n] -= steps
+
+        dead = np.flatnonzero(self.life[:n] <= 0)
+        d = len(dead)
+        if not d: return
+        # Swap-remove en bloque: los vivos de la cola [n-d, n) rellenan los huecos de [0, n-d)
+        tail = n - d
+        holes = dead[dead < tail]
+        if len(holes):
+            is_dead = np.zeros(d, bool)
+            is_dead[dead[dead >= tail] - tail] = True
+            movers = tail + np.flatnonzero(~is_dead)
+            for name, _ in self.FIELDS:
+                arr = getattr(self, name)
+                arr[holes] = arr[movers]
+        self.n = tail
+        self.stats["expired"] += d
+
+    # --- Dibujo ---
+    def queue(self, render_queue, layer):
+        """Mete las partículas visibles en la RenderQueue (recorte en bloque contra el viewport)."""
+        n = self.n
+        if not n: return
+        x = self.x[:n].astype(np.int32)
+        y = self.y[:n].astype(np.int32)
+        sids = self.surf[:n]
+        sizes = self._sizes[sids]
+        idx = render_queue.visible(x, sizes[:, 0], y, sizes[:, 1])
+        if not len(idx): return
+        levels = (self.life[idx].astype(np.int32) * ALPHA_LEVELS - 1) // np.maximum(self.max_life[idx], 1)
+        levels = np.clip(levels, 0, ALPHA_LEVELS - 1)
+        # Una búsqueda de variante por (superficie, alpha) distinto, no por partícula
+        combos, inverse = np.unique(sids[idx] * ALPHA_LEVELS + levels, return_inverse=True)
+        lut = np.empty(len(combos), object)
+        for i, combo in enumerate(combos.tolist()):
+            lut[i] = self._variant(*divmod(combo, ALPHA_LEVELS))
+        render_queue.extend(layer, list(zip(lut[inverse].tolist(), zip(x[idx].tolist(), y[idx].tolist()))))
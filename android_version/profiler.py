@@ -0,0 +1,154 @@
+# --- FRAME PROFILER ---
+# Cronometra cada fase de GameState.run_frame y cuenta spawns, bajas, soldados
+# activos y profundidad de la cola. Guarda una ventana móvil de frames,
+# dibuja un overlay opcional (tecla P) y exporta histogramas a JSON o CSV.
+import csv
+import json
+import time
+from collections import deque
+
+from config import PROFILE_WINDOW, PROFILE_OVERLAY, PROFILE_EXPORT_PATH, PROFILE_EXPORT_INTERVAL
+
+# queue: recoger sprites y nombres en la RenderQueue; particles: mover y recoger partículas;
+# draw: fondo + el blits() de todo lo recogido
+PHASES = ("events", "movement", "collision", "queue", "particles", "draw", "ui", "flip", "audio")
+COUNTERS = ("spawns", "removals", "ticks", "active", "pool_free", "queue_depth", "dropped_frames", "dropped_exports",
+            "particles", "culled")
+# Límites superiores (ms) de los cubos del histograma
+HISTOGRAM_BUCKETS_MS = (0.5, 1, 2, 4, 8, 16, 33, 66)
+
+
+def _percentile(ordered, pct):
+    if not ordered: return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class FrameProfiler:
+    def __init__(self, window=PROFILE_WINDOW, export_path=PROFILE_EXPORT_PATH,
+                 export_interval=PROFILE_EXPORT_INTERVAL):
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self._last_export = time.perf_counter()
+        self.samples = {phase: deque(maxlen=window) for phase in PHASES + ("frame",)}
+        self.counter_samples = {name: deque(maxlen=window) for name in COUNTERS}
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.show_overlay = PROFILE_OVERLAY
+        self._frame_start = 0.0
+        self._mark = 0.0
+        self._overlay_surfs = []
+        self._overlay_updated = 0.0
+
+    # --- Medición ---
+    def begin_frame(self):
+        self._frame_start = self._mark = time.perf_counter()
+        for phase in PHASES:
+            self.current[phase] = 0.0
+
+    def mark(self, phase):
+        """Asigna a `phase` el tiempo transcurrido desde la marca anterior."""
+        now = time.perf_counter()
+        self.current[phase] += now - self._mark
+        self._mark = now
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def gauge(self, name, value):
+        self.counters[name] = value
+
+    def end_frame(self):
+        now = time.perf_counter()
+        for phase in PHASES:
+            self.samples[phase].append(self.current[phase])
+        self.samples["frame"].append(now - self._frame_start)
+        for name in COUNTERS:
+            self.counter_samples[name].append(self.counters[name])
+        # spawns/removals/ticks son por frame; active/queue_depth/dropped son gauges
+        self.counters["spawns"] = 0
+        self.counters["removals"] = 0
+        self.counters["ticks"] = 0
+        
+        if self.export_path and now - self._last_export >= self.export_interval:
+            self._last_export = now
+            try:
+                self.export(self.export_path)
+            except OSError as e:
+                print(f"⚠️ No se pudo exportar el perfil: {e}")
+
+    def last_frame_time(self):
+        frames = self.samples["frame"]
+        return frames[-1] if frames else 0.0
+
+    # --- Resumen / export ---
+    def summary(self):
+        result = {"frames": len(self.samples["frame"]), "phases": {}, "counters": {}}
+        for phase, values in self.samples.items():
+            ordered = sorted(values)
+            ms = [v * 1000 for v in ordered]
+            histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+            for v in ms:
+                for i, limit in enumerate(HISTOGRAM_BUCKETS_MS):
+                    if v <= limit:
+                        histogram[i] += 1
+                        break
+                else:
+                    histogram[-1] += 1
+            result["phases"][phase] = {
+                "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+                "p50_ms": round(_percentile(ms, 50), 3),
+                "p99_ms": round(_percentile(ms, 99), 3),
+                "max_ms": round(ms[-1], 3) if ms else 0.0,
+                "histogram": histogram,
+            }
+        for name, values in self.counter_samples.items():
+            result["counters"][name] = {
+                "last": values[-1] if values else 0,
+                "max": max(values) if values else 0,
+                "mean": round(sum(values) / len(values), 2) if values else 0.0,
+            }
+        return result
+
+    def export(self, path):
+        """Vuelca la ventana actual a JSON o CSV según la extensión."""
+        summary = self.summary()
+        summary["buckets_ms"] = list(HISTOGRAM_BUCKETS_MS) + ["inf"]
+        if path.endswith(".csv"):
+            bucket_cols = [f"<={b}ms" for b in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}ms"]
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["phase", "mean_ms", "p50_ms", "p99_ms", "max_ms"] + bucket_cols)
+                for phase, st in summary["phases"].items():
+                    writer.writerow([phase, st["mean_ms"], st["p50_ms"], st["p99_ms"], st["max_ms"]] + st["histogram"])
+                writer.writerow([])
+                writer.writerow(["counter", "last", "max", "mean"])
+                for name, st in summary["counters"].items():
+                    writer.writerow([name, st["last"], st["max"], st["mean"]])
+        else:
+            with open(path, "w") as f:
+                json.dump(summary, f, indent=2)
+
+    # --- Overlay ---
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+
+    def draw_overlay(self, screen, font, x=20, y=300):
+        now = time.perf_counter()
+        if now - self._overlay_updated > 0.5: # Re-render 2 veces por segundo, no cada frame
+            self._overlay_updated = now
+            summary = self.summary()
+            lines = []
+            for phase in PHASES + ("frame",):
+                st = summary["phases"][phase]
+                lines.append(f"{phase:<12} {st['mean_ms']:6.2f}ms  p99 {st['p99_ms']:6.2f}ms")
+            c = summary["counters"]
+            lines.append(f"activos {c['active']['last']}  pool {c['pool_free']['last']}  cola {c['queue_depth']['last']}  "
+                         f"perdidos {c['dropped_frames']['last']}  export perdidos {c['dropped_exports']['last']}  "
+                         f"partículas {c['particles']['last']}  fuera {c['culled']['last']}")
+            lines.append(f"spawns/f {c['spawns']['mean']}  bajas/f {c['removals']['mean']}  ticks/f {c['ticks']['mean']}")
+            self._overlay_surfs = [font.render(line, True, (0, 255, 0), (0, 0, 0)) for line in lines]
+        rects = []
+        for surf in self._overlay_surfs:
+            rects.append(screen.blit(surf, (x, y)))
+            y += surf.get_height() + 2
+        return rects
@@ -0,0 +1,70 @@
+# --- GOBERNADOR DE CALIDAD ---
+# Mira el tiempo de frame medido por el profiler (trabajo de run_frame, sin el
+# sleep del scheduler) y sube o baja la calidad de nivel en nivel: tope de minis
+# por like, textos flotantes, nombres, FPS objetivo, umbral de escuadras (LOD) y
+# cantidad de partículas de los efectos (regalos, victorias, reset).
+# Un móvil flojo baja solo hasta ir fluido; un PC se queda en el nivel máximo.
+from collections import deque
+
+from config import (TARGET_FPS, SQUAD_THRESHOLD, QUALITY_WINDOW,
+                    QUALITY_DOWNGRADE_AT, QUALITY_UPGRADE_AT)
+
+# nombre, factor del tope de likes, textos flotantes, nombres, factor de FPS, factor del umbral de escuadras,
+# factor de partículas de efectos
+LEVELS = (
+    ("ALTA",   1.0,  True,  True,  1.0,  1.0,  1.0),
+    ("MEDIA",  0.5,  True,  True,  1.0,  0.6,  0.5),
+    ("BAJA",   0.25, False, True,  0.8,  0.3,  0.2),
+    ("MÍNIMA", 0.1,  False, False, 0.67, 0.15, 0.0),
+)
+
+
+class QualityGovernor:
+    def __init__(self, fps=TARGET_FPS, window=QUALITY_WINDOW):
+        self.base_fps = fps
+        self.base_like_cap = None # Se toma de la EventQueue la primera vez
+        self.samples = deque(maxlen=window)
+        self.level = 0
+        self.changes = 0
+        self._apply_level()
+
+    def _apply_level(self):
+        name, like_factor, floating, names, fps_factor, squad_factor, effects = LEVELS[self.level]
+        self.name = name
+        self.floating_texts = floating
+        self.names = names
+        self.fps = max(10, int(round(self.base_fps * fps_factor)))
+        self.squad_threshold = max(10, int(SQUAD_THRESHOLD * squad_factor))
+        self.like_factor = like_factor
+        self.effects = effects
+
+    def like_cap(self):
+        return max(1, int(self.base_like_cap * self.like_factor))
+
+    def observe(self, frame_time, events=None):
+        """Registra un frame; devuelve True si cambió el nivel."""
+        if events is not None and self.base_like_cap is None:
+            self.base_like_cap = events.like_cap
+        samples = self.samples
+        samples.append(frame_time)
+        if len(samples) < samples.maxlen: return False
+        
+        p90 = sorted(samples)[int(len(samples) * 0.9)]
+        if p90 > QUALITY_DOWNGRADE_AT / self.fps and self.level < len(LEVELS) - 1:
+            self.level += 1
+        elif self.level > 0 and p90 < QUALITY_UPGRADE_AT / self._fps_for(self.level - 1):
+            self.level -= 1
+        else:
+            return False
+        
+        # Histéresis: tras un cambio se vuelve a llenar la ventana entera
+        samples.clear()
+        self.changes += 1
+        self._apply_level()
+        if events is not None and self.base_like_cap is not None:
+            events.like_cap = self.like_cap()
+        print(f"⚙️ Calidad -> {self.name} (p90 {p90 * 1000:.1f}ms, objetivo {self.fps} FPS)")
+        return True
+
+    def _fps_for(self, level):
+        return max(10, int(round(self.base_fps * LEVELS[level][4])))
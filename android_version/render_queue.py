@@ -0,0 +1,82 @@
+# --- RENDER QUEUE ---
+# El campo de batalla no se dibuja soldado a soldado: run_frame recoge las
+# tuplas (superficie, destino[, area]) del frame en capas, descarta en bloque lo
+# que cae fuera del viewport (los spawns de SPAWN_X_RANGE_* empiezan fuera) y al
+# final las ordena por capa y por y (lo de más abajo tapa a lo de más arriba) y
+# las envía con un único Surface.blits(..., doreturn=False).
+import numpy as np
+import pygame
+
+LAYER_SOLDIERS, LAYER_LABELS, LAYER_PARTICLES = range(3)
+# Los nombres sobresalen del sprite: se recortan con el sprite más este margen a cada lado
+# (lo que quede en el margen fuera de pantalla lo recorta SDL)
+LABEL_CULL_MARGIN = 100
+# Capas que se ordenan por profundidad (las partículas van en orden de emisión)
+DEPTH_SORTED = (LAYER_SOLDIERS, LAYER_LABELS)
+
+
+class RenderQueue:
+    def __init__(self, size, layers=3, depth_sorted=DEPTH_SORTED):
+        self.width, self.height = size
+        self.blits = [[] for _ in range(layers)]
+        self.depths = [[] for _ in range(layers)]
+        self.depth_sorted = set(depth_sorted)
+        self.culled = 0
+        self.stats = {"frames": 0, "submitted": 0, "culled": 0}
+
+    def __len__(self):
+        return sum(len(blits) for blits in self.blits)
+
+    # --- Recogida ---
+    def visible(self, x, w, y=None, h=None, margin=0, count=True):
+        """Índices de los rects (arrays) que tocan el viewport (ensanchado `margin` px por lado)."""
+        mask = (x < self.width + margin) & (x + w > -margin)
+        if y is not None:
+            mask &= (y < self.height) & (y + h > 0)
+        idx = np.flatnonzero(mask)
+        if count:
+            self.culled += len(x) - len(idx)
+        return idx
+
+    def visible_rects(self, rects, dx=0, margin=0, count=True):
+        """Lo mismo para una lista de pygame.Rect desplazados dx: un solo collidelistall (en C)."""
+        view = pygame.Rect(-dx - margin, 0, self.width + 2 * margin, self.height)
+        idx = view.collidelistall(rects)
+        if count:
+            self.culled += len(rects) - len(idx)
+        return idx
+
+    def add(self, layer, blit, depth=0):
+        self.blits[layer].append(blit)
+        self.depths[layer].append(depth)
+
+    def extend(self, layer, blits, depths=None):
+        """Añade un lote ya recortado; depths es una lista/array paralela (capas ordenadas)."""
+        self.blits[layer].extend(blits)
+        if layer in self.depth_sorted:
+            self.depths[layer].extend(depths)
+
+    # --- Envío ---
+    def flush(self, screen, dirty=None):
+        """Ordena y blitea todo en una llamada; con dirty apunta los rects dibujados."""
+        seq = []
+        for layer, blits in enumerate(self.blits):
+            if not blits: continue
+            if layer in self.depth_sorted and len(blits) > 1:
+                order = np.argsort(np.asarray(self.depths[layer]), kind="stable").tolist()
+                seq.extend([blits[i] for i in order])
+            else:
+                seq.extend(blits)
+            blits.clear()
+            self.depths[layer].clear()
+
+        st = self.stats
+        st["frames"] += 1
+        st["submitted"] += len(seq)
+        st["culled"] += self.culled
+        self.culled = 0
+        if dirty is None:
+            screen.blits(seq, False)
+        else:
+            dirty.extend(screen.blits(seq))
+        return len(seq)
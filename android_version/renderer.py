@@ -0,0 +1,76 @@
+# --- DIRTY RECT RENDERER ---
+# En vez de fill + flip de 1080x1920 cada frame, el fondo vive en una
+# superficie cacheada y solo se restaura y se sube a pantalla lo que cambió:
+# los rects dibujados el frame anterior (se borran) y los de este frame.
+# En los ratos tranquilos son unos pocos soldados; con la pantalla llena se
+# vuelve al flip completo (DIRTY_RECT_MAX).
+import pygame
+
+from config import BACKGROUND_COLOR, DIRTY_RECT_MAX
+
+
+class DirtyRectRenderer:
+    def __init__(self, size, max_rects=DIRTY_RECT_MAX):
+        self.max_rects = max_rects
+        self.background = pygame.Surface(size)
+        self.background.fill(BACKGROUND_COLOR)
+        self.dirty = []       # Rects dibujados en este frame
+        self._previous = []   # Rects del frame anterior (hay que borrarlos)
+        self._full = True     # Primer frame: pantalla completa
+        self._next_full = False
+        self.stats = {"frames": 0, "full": 0, "rects": 0}
+
+    def set_background(self, surface):
+        """Sustituye la capa estática (fondo) y fuerza un redibujado completo."""
+        self.background = surface
+        self._full = True
+
+    def invalidate(self):
+        self._full = True
+
+    def begin(self, screen, expected=0):
+        """Borra lo dibujado el frame anterior restaurando el fondo cacheado.
+
+        expected: rects que se van a dibujar. Si ya superan el máximo el frame
+        será un flip completo y devuelve False: no merece la pena apuntarlos.
+        """
+        crowded = expected > self.max_rects
+        if self._full or crowded or len(self._previous) > self.max_rects:
+            # Un frame completo no deja rects apuntados: el siguiente también lo es
+            self._full = True
+            self._next_full = crowded
+            screen.blit(self.background, (0, 0))
+            return not crowded
+        else:
+            background = self.background
+            for rect in self._previous:
+                screen.blit(background, rect, rect)
+        return True
+
+    def restore(self, screen, rects, changed=False):
+        """Restaura el fondo bajo la UI (marcador, log) antes de re-blitearla.
+
+        Si no cambió, el resultado es idéntico al del frame anterior y no hace
+        falta subirlo; si cambió (changed=True) se marca como sucio.
+        """
+        background = self.background
+        for rect in rects:
+            screen.blit(background, rect, rect)
+        if changed:
+            self.dirty.extend(rects)
+
+    def present(self, headless=False):
+        rects = self._previous + self.dirty
+        self.stats["frames"] += 1
+        if self._full or len(rects) > self.max_rects:
+            self.stats["full"] += 1
+            if not headless:
+                pygame.display.flip()
+        else:
+            self.stats["rects"] += len(rects)
+            if not headless:
+                pygame.display.update(rects)
+        self._full = self._next_full
+        self._next_full = False
+        self._previous = self.dirty
+        self.dirty = []
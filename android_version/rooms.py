@@ -0,0 +1,224 @@
+# --- MULTI-ROOM ---
+# Varios lives de TikTok en el mismo event loop (batallas co-host: la sala de
+# un creador alimenta a RED y la del otro a BLUE). Cada sala marca sus eventos
+# con la hora del evento (create_time del servidor pasada al reloj local con un
+# desfase estimado por sala); RoomMux los mezcla en un solo stream ordenado por
+# tiempo (con una pequeña ventana de reordenado) y los vuelca en la EventQueue
+# con el equipo y el peso de la sala. Cada ROOM_REPORT_INTERVAL segundos
+# informa de eventos/s, lag local y retraso de red por sala.
+#
+#   python main.py --room creador_a:RED --room creador_b:BLUE:1.5
+#   python main.py --fake-rooms 2           # salas falsas locales, sin red
+#   python rooms.py --fake-rooms 3 --seconds 5
+import asyncio
+import heapq
+import sys
+import time
+
+from config import ROOMS, ROOM_REORDER_MS, ROOM_REPORT_INTERVAL
+from session_recorder import event_to_record
+
+KINDS = ("gift", "connect", "disconnect", "join", "like")
+ROOM_LOG_COLOR = (0, 255, 0)
+
+
+def server_time(event):
+    """create_time de TikTok en segundos (reloj del servidor), None si no viene."""
+    base = getattr(event, 'base_message', None)
+    create_time = getattr(base, 'create_time', None) or getattr(event, 'create_time', None)
+    if create_time:
+        return create_time / 1000 if create_time > 1e11 else float(create_time)
+    return None
+
+
+class Room:
+    def __init__(self, unique_id, team=None, weight=1.0):
+        self.unique_id = unique_id
+        self.team = team
+        self.weight = weight
+        self.client = None
+        self.connected = False
+        self.events = 0
+        self.rate = 0.0        # Eventos/s en el último informe
+        self.lag_ms = 0.0      # Llegada -> EventQueue (último; ventana de reordenado incluida)
+        self.max_lag_ms = 0.0
+        self.offset = None     # Reloj local - reloj del servidor (mínimo visto: desfase + mejor tránsito)
+        self.net_ms = 0.0      # Retraso de red del último evento sobre el mejor tránsito visto
+        self._reported_events = 0
+
+    def align(self, server_t, arrival):
+        """Hora del evento en el reloj local. Sin create_time vale la de llegada.
+
+        El desfase de relojes no se conoce, pero llegada - servidor nunca baja de
+        él: el mínimo visto lo acota y mantiene el orden del servidor dentro de la
+        sala sin que un reloj adelantado o atrasado retrase o cuele sus eventos.
+        """
+        if server_t is None: return arrival
+        delta = arrival - server_t
+        if self.offset is None or delta < self.offset:
+            self.offset = delta
+        self.net_ms = round((delta - self.offset) * 1000, 1)
+        return server_t + self.offset
+
+    def __repr__(self):
+        return f"@{self.unique_id}" + (f"->{self.team}" if self.team else "")
+
+
+class RoomMux:
+    def __init__(self, rooms, reorder_ms=ROOM_REORDER_MS, report_interval=ROOM_REPORT_INTERVAL):
+        self.rooms = rooms
+        self.reorder = reorder_ms / 1000
+        self.report_interval = report_interval
+        self._heap = []        # (t local, seq, room, kind, record, llegada)
+        self._seq = 0
+        self._last_report = time.monotonic()
+        self.finished = False
+
+    # --- Entrada: un juego de handlers por sala ---
+    def handlers_for(self, room):
+        def make(kind):
+            async def handler(event):
+                try:
+                    record = event_to_record(kind, event) if kind != "disconnect" else {"type": kind}
+                except Exception as e:
+                    print(f"⚠️ {room}: evento {kind} ilegible: {e}")
+                    return
+                if kind == "gift" and record["streakable"] and not record["streak_end"]:
+                    return # Combo a medias
+                self._seq += 1
+                arrival = time.time()
+                t = room.align(server_time(event), arrival)
+                heapq.heappush(self._heap, (t, self._seq, room, kind, record, arrival))
+            return handler
+        return {kind: make(kind) for kind in KINDS}
+
+    # --- Salida: stream mezclado y ordenado -> EventQueue ---
+    def pump(self, events, game=None, flush=False):
+        """Aplica los eventos más viejos que la ventana de reordenado (todos con flush)."""
+        now = time.time()
+        ready = now + 1e9 if flush else now - self.reorder
+        heap = self._heap
+        while heap and heap[0][0] <= ready:
+            t, _, room, kind, record, arrival = heapq.heappop(heap)
+            room.events += 1
+            lag = (now - arrival) * 1000
+            room.lag_ms = round(lag, 1)
+            room.max_lag_ms = round(max(room.max_lag_ms, lag), 1)
+
+            if kind == "like":
+                events.push_like(record["user"], record["likes"] * room.weight, room.team, record["uid"])
+            elif kind == "join":
+                events.push_join(record["user"], room.team, record["uid"])
+            elif kind == "gift":
+                events.push_gift(record["user"], record["name"], record["group_id"] or None,
+                                 record["id"], room.team, room.weight, record["uid"])
+            elif kind == "connect":
+                room.connected = True
+                print(f"✅ CONECTADO: {room}")
+                if game: game.add_log(f"✅ {room}", ROOM_LOG_COLOR)
+            else:
+                room.connected = False
+                print(f"❌ DESCONECTADO: {room}")
+                if game: game.add_log(f"❌ {room}", (255, 0, 0))
+
+        if time.monotonic() - self._last_report >= self.report_interval:
+            self.report()
+
+    def report(self):
+        now = time.monotonic()
+        elapsed = max(now - self._last_report, 1e-6)
+        self._last_report = now
+        for room in self.rooms:
+            room.rate = round((room.events - room._reported_events) / elapsed, 1)
+            room._reported_events = room.events
+        print("📡 " + self.summary())
+
+    def summary(self):
+        return "  ".join(f"{room}: {room.rate} ev/s lag {room.lag_ms}ms (máx {room.max_lag_ms}ms) red +{room.net_ms}ms"
+                         for room in self.rooms)
+
+    # --- Fuentes ---
+    def live_sources(self, recorder=None):
+        """Un TikTokLiveClient por sala, todos en este event loop."""
+        from TikTokLive import TikTokLiveClient
+        from TikTokLive.events import GiftEvent, ConnectEvent, DisconnectEvent, JoinEvent, LikeEvent
+        sources = []
+        for room in self.rooms:
+            room.client = TikTokLiveClient(unique_id=room.unique_id)
+            handlers = self.handlers_for(room)
+            for event_type, kind in ((GiftEvent, "gift"), (ConnectEvent, "connect"), (DisconnectEvent, "disconnect"),
+                                     (JoinEvent, "join"), (LikeEvent, "like")):
+                handler = handlers[kind]
+                if recorder and kind != "disconnect":
+                    handler = recorder.wrap(kind, handler)
+                room.client.add_listener(event_type, handler)
+            sources.append(room.client.start())
+        return sources
+
+    def fake_sources(self, rate=100, seconds=10.0):
+        """Productores locales (ingest_worker.fake_source), uno por sala con su propia seed."""
+        from ingest_worker import fake_source
+        return [fake_source(self.handlers_for(room), rate, seconds, seed=i) for i, room in enumerate(self.rooms)]
+
+    async def run(self, events, sources, game=None):
+        """Corrutina para asyncio.gather(): corre las fuentes y bombea hasta que terminan."""
+        tasks = [asyncio.ensure_future(source) for source in sources]
+        try:
+            while not all(task.done() for task in tasks):
+                self.pump(events, game)
+                await asyncio.sleep(self.reorder / 2)
+        finally:
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception():
+                    print(f"❌ Sala caída: {task.exception()}")
+        self.pump(events, game, flush=True)
+        self.finished = True
+        self.report()
+
+    async def disconnect(self):
+        for room in self.rooms:
+            if room.client and room.client.connected:
+                await room.client.disconnect()
+
+
+def parse_room(spec):
+    """"usuario:EQUIPO[:peso]" -> Room (EQUIPO puede ser "-" para reglas normales)."""
+    parts = spec.lstrip("@").split(":")
+    team = parts[1].upper() if len(parts) > 1 and parts[1] not in ("", "-") else None
+    weight = float(parts[2]) if len(parts) > 2 else 1.0
+    return Room(parts[0], team, weight)
+
+
+def room_args(argv):
+    """Salas de la línea de comandos (--room, repetible) o de config.ROOMS -> (rooms, fake_rooms)."""
+    rooms = [parse_room(argv[i + 1]) for i, arg in enumerate(argv[:-1]) if arg == "--room"]
+    fake = 0
+    if "--fake-rooms" in argv:
+        i = argv.index("--fake-rooms")
+        fake = int(argv[i + 1]) if i + 1 < len(argv) else 2
+        teams = ("RED", "BLUE")
+        rooms = [Room(f"fake{i}", teams[i % 2]) for i in range(fake)]
+    if not rooms:
+        rooms = [Room(r["unique_id"], r.get("team"), r.get("weight", 1.0)) for r in ROOMS]
+    return rooms, fake
+
+
+def main(argv=None):
+    """Prueba sin red: N salas falsas -> EventQueue."""
+    import argparse
+    from event_queue import EventQueue
+    parser = argparse.ArgumentParser(description="Multi-room con salas falsas locales")
+    parser.add_argument("--fake-rooms", type=int, default=2)
+    parser.add_argument("--rate", type=int, default=200, help="Eventos por segundo por sala")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    rooms, _ = room_args(["--fake-rooms", str(args.fake_rooms)])
+    mux = RoomMux(rooms, report_interval=1.0)
+    events = EventQueue()
+    asyncio.run(mux.run(events, mux.fake_sources(args.rate, args.seconds)))
+    print(f"📥 cola: {events.summary()}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
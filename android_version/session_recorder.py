@@ -0,0 +1,148 @@
+# --- SESSION RECORDER / REPLAY ---
+# Graba los eventos de TikTokLive (Gift/Like/Join/Connect) con marca de tiempo
+# en un JSONL append-only y los vuelve a inyectar en los mismos handlers sin
+# red, a 1x, Nx o sin límite de velocidad. Sirve para reproducir los tirones de
+# un live real en casa.
+#
+# Formato (una línea por evento, "t" = segundos desde el inicio de la sesión):
+#   {"t": 0.0, "type": "connect", "unique_id": "..."}
+#   {"t": 1.25, "type": "join", "user": "...", "uid": "..."}
+#   {"t": 1.30, "type": "like", "user": "...", "uid": "...", "likes": 15}
+#   {"t": 2.10, "type": "gift", "user": "...", "uid": "...", "name": "Rose", "id": 5655,
+#    "streakable": true, "streak_end": false, "group_id": 123}
+# "user" es el nick que se muestra; "uid" el unique_id de TikTok (puede faltar en sesiones viejas).
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+
+from config import SESSIONS_DIR
+
+
+def _user_name(event, default="Unknown"):
+    user = getattr(event, 'user', None)
+    return getattr(user, 'nick_name', None) or getattr(user, 'username', default)
+
+
+def user_key(event):
+    """unique_id de TikTok del espectador (o su id numérico); None si no viene."""
+    user = getattr(event, 'user', None)
+    uid = getattr(user, 'unique_id', None) or getattr(user, 'user_id', None) or getattr(user, 'id', None)
+    return str(uid) if uid else None
+
+
+def event_to_record(kind, event):
+    record = {"type": kind}
+    if kind == "connect":
+        record["unique_id"] = getattr(event, 'unique_id', "")
+    elif kind == "join":
+        record["user"] = _user_name(event)
+        record["uid"] = user_key(event)
+    elif kind == "like":
+        record["user"] = _user_name(event, "Alguien")
+        record["uid"] = user_key(event)
+        record["likes"] = int(getattr(event, 'likes', None) or getattr(event, 'total_likes', None) or getattr(event, 'count', 1) or 1)
+    elif kind == "gift":
+        gift = event.gift
+        record["user"] = _user_name(event)
+        record["uid"] = user_key(event)
+        record["name"] = gift.name
+        record["id"] = getattr(gift, 'id', None)
+        record["streakable"] = bool(getattr(gift, 'streakable', False))
+        record["streak_end"] = bool(getattr(gift, 'streak_end', True))
+        record["group_id"] = getattr(event, 'group_id', None)
+    return record
+
+
+def record_to_event(record):
+    """Objeto con la misma forma que los eventos de TikTokLive que leen los handlers."""
+    kind = record["type"]
+    if kind == "connect":
+        return SimpleNamespace(unique_id=record.get("unique_id", ""))
+
+    user = SimpleNamespace(nick_name=record.get("user"), username=record.get("user"), unique_id=record.get("uid"))
+    if kind == "like":
+        return SimpleNamespace(user=user, likes=record.get("likes", 1))
+    if kind == "gift":
+        gift = SimpleNamespace(name=record["name"], id=record.get("id"),
+                               streakable=record.get("streakable", False),
+                               streak_end=record.get("streak_end", True))
+        return SimpleNamespace(user=user, gift=gift, group_id=record.get("group_id"))
+    return SimpleNamespace(user=user)
+
+
+class SessionRecorder:
+    def __init__(self, path=None, flush_every=50):
+        if path is None:
+            os.makedirs(SESSIONS_DIR, exist_ok=True)
+            path = os.path.join(SESSIONS_DIR, time.strftime("session_%Y%m%d_%H%M%S.jsonl"))
+        self.path = path
+        self.flush_every = flush_every
+        self.count = 0
+        self._start = time.monotonic()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, kind, event):
+        try:
+            record = event_to_record(kind, event)
+        except Exception as e:
+            print(f"⚠️ No se pudo grabar evento {kind}: {e}")
+            return
+        record["t"] = round(time.monotonic() - self._start, 4)
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self._file.flush()
+
+    def wrap(self, kind, handler):
+        """Listener que graba el evento y luego llama al handler original."""
+        async def recording_handler(event):
+            self.record(kind, event)
+            await handler(event)
+        return recording_handler
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def replay_args(argv):
+    """Lee "--replay fichero.jsonl [--speed N]" de la línea de comandos -> (path, speed)."""
+    path, speed = None, 1.0
+    if "--replay" in argv:
+        i = argv.index("--replay")
+        path = argv[i + 1] if i + 1 < len(argv) else None
+    if "--speed" in argv:
+        i = argv.index("--speed")
+        speed = float(argv[i + 1]) if i + 1 < len(argv) else 1.0
+    return path, speed
+
+
+def load_session(path):
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+async def replay_session(path, handlers, speed=1.0):
+    """Reinyecta una sesión grabada. handlers = {"gift": on_gift, ...}; speed 0 = sin límite."""
+    records = load_session(path)
+    print(f"⏯️ Reproduciendo {len(records)} eventos de {path} ({'sin límite' if not speed else f'{speed}x'})")
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for record in records:
+        handler = handlers.get(record["type"])
+        if handler is None: continue
+        if speed:
+            delay = start + record.get("t", 0) / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0) # Dejar respirar al game loop
+        await handler(record_to_event(record))
+    print("⏹️ Fin de la sesión grabada")
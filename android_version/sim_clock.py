@@ -0,0 +1,43 @@
+# --- RELOJ DE SIMULACIÓN (paso fijo) ---
+# Acumula el tiempo real entre frames y lo reparte en ticks de 1/SIM_TICK_RATE.
+# Si el render va lento se hacen varios ticks por frame (como mucho
+# SIM_MAX_TICKS_PER_FRAME; el resto se descarta para no entrar en espiral) y si
+# va rápido hay frames sin tick. alpha() dice cuánto del siguiente tick ha
+# pasado, para interpolar las posiciones al dibujar.
+import time
+
+from config import SIM_TICK_RATE, SIM_MAX_TICKS_PER_FRAME
+
+
+class SimClock:
+    def __init__(self, tick_rate=SIM_TICK_RATE, max_ticks=SIM_MAX_TICKS_PER_FRAME):
+        self.tick_time = 1.0 / tick_rate
+        self.max_ticks = max_ticks
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.lost_time = 0.0 # Segundos descartados por el tope de recuperación
+        self._last = None
+
+    def advance(self, now=None):
+        """Ticks de simulación a ejecutar en este frame."""
+        if now is None:
+            now = time.perf_counter()
+        if self._last is None:
+            self._last = now
+            self.ticks += 1
+            return 1 # Primer frame: un tick para arrancar
+        self.accumulator += now - self._last
+        self._last = now
+        
+        n = int(self.accumulator / self.tick_time + 1e-9) # Epsilon: 0.1 / (1/30) no da 3 exacto
+        if n > self.max_ticks:
+            self.lost_time += (n - self.max_ticks) * self.tick_time
+            self.accumulator -= (n - self.max_ticks) * self.tick_time
+            n = self.max_ticks
+        self.accumulator -= n * self.tick_time
+        self.ticks += n
+        return n
+
+    def alpha(self):
+        """Fracción (0..1) del próximo tick ya transcurrida."""
+        return min(1.0, self.accumulator / self.tick_time)
@@ -0,0 +1,137 @@
+# --- PIPELINE DE ASSETS (offline) ---
+# Prepara assets/ para un arranque rápido (sobre todo en Android):
+#   1. Deduplica por hash de contenido (p.ej. gift_rose.png vs gift_rose_1766546153593.png).
+#   2. Reescala los soldados de 1024x1024 a los tamaños que usa Soldier y los
+#      empaqueta en un atlas (soldiers.atlas + soldiers-0.png).
+# El juego carga el atlas con una lectura de JSON y una de PNG; si no existe,
+# sigue cargando los PNG originales.
+#
+#   python clean_assets.py                    # android_version/assets y assets/
+#   python clean_assets.py --prune            # además borra los PNG duplicados (iconos de regalos)
+#   python clean_assets.py ruta/a/assets      # solo ese directorio
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ANDROID_DIR = os.path.join(ROOT, "android_version")
+sys.path.insert(0, ANDROID_DIR) # config + tamaños del motor Android (la fuente de verdad)
+
+from config import SOLDIER_ATLAS, TIER_2_THRESHOLD, TIER_3_THRESHOLD, TIER_4_THRESHOLD
+from game_engine import tier_for_power, size_for_power, prewarm_powers, SpriteCache
+
+ATLAS_MAX_WIDTH = 2048
+PADDING = 2
+SOLDIER_SOURCES = {
+    ("RED", 1): "red_soldier.png", ("RED", 2): "red_soldier_t2.png",
+    ("RED", 3): "red_soldier_t3.png", ("RED", 4): "red_soldier_t4.png",
+    ("BLUE", 1): "blue_soldier.png", ("BLUE", 2): "blue_soldier_t2.png",
+    ("BLUE", 3): "blue_soldier_t3.png", ("BLUE", 4): "blue_soldier_t4.png",
+}
+# Mayor poder de cada tier (el tamaño está capado, así que da el sprite más grande)
+TIER_MAX_POWER = {1: TIER_2_THRESHOLD - 1, 2: TIER_3_THRESHOLD - 1, 3: TIER_4_THRESHOLD - 1, 4: 10 ** 6}
+
+
+def content_hash(path):
+    # Hash de los píxeles decodificados: dos PNG iguales re-codificados cuentan como duplicados
+    img = pygame.image.load(path)
+    digest = hashlib.sha1(str(img.get_size()).encode())
+    digest.update(pygame.image.tobytes(img, "RGBA"))
+    return digest.hexdigest()
+
+def find_duplicates(assets_dir):
+    """{hash: [nombres]} solo para los PNG con contenido repetido (el más corto primero)."""
+    by_hash = {}
+    for name in sorted(os.listdir(assets_dir)):
+        if name.endswith(".png") and not name.endswith("-0.png"): # "-0.png" son páginas de atlas
+            by_hash.setdefault(content_hash(os.path.join(assets_dir, name)), []).append(name)
+    return {h: sorted(names, key=len) for h, names in by_hash.items() if len(names) > 1}
+
+def pack(images):
+    """Empaquetado por estanterías. images = {nombre: Surface} -> (Surface, {nombre: [x, y, w, h]})."""
+    order = sorted(images, key=lambda n: (-images[n].get_height(), n))
+    rects, x, y, shelf_h, width = {}, 0, 0, 0, 0
+    for name in order:
+        w, h = images[name].get_size()
+        if x + w > ATLAS_MAX_WIDTH:
+            x, y, shelf_h = 0, y + shelf_h + PADDING, 0
+        rects[name] = [x, y, w, h]
+        x += w + PADDING
+        shelf_h = max(shelf_h, h)
+        width = max(width, x)
+    sheet = pygame.Surface((max(width, 1), max(y + shelf_h, 1)), pygame.SRCALPHA)
+    for name, (rx, ry, w, h) in rects.items():
+        sheet.blit(images[name], (rx, ry))
+    return sheet, rects
+
+def write_atlas(assets_dir, atlas_name, images):
+    page = atlas_name.replace(".atlas", "-0.png")
+    sheet, rects = pack(images)
+    pygame.image.save(sheet, os.path.join(assets_dir, page))
+    with open(os.path.join(assets_dir, atlas_name), "w") as f:
+        json.dump({page: rects}, f, indent=1, sort_keys=True)
+    return sheet.get_size()
+
+def soldier_sizes():
+    """{tier: tamaños (en buckets de la cache) que se pre-hornean}."""
+    sizes = {}
+    for power in prewarm_powers():
+        tier = tier_for_power(power)
+        sizes.setdefault(tier, set()).add(SpriteCache.bucket(size_for_power(power, tier)))
+    return sizes
+
+def build_soldier_atlas(assets_dir):
+    sizes = soldier_sizes()
+    images = {}
+    for team in ("RED", "BLUE"):
+        for tier in (1, 2, 3, 4):
+            path = os.path.join(assets_dir, SOLDIER_SOURCES[(team, tier)])
+            if not os.path.exists(path):
+                path = os.path.join(assets_dir, SOLDIER_SOURCES[(team, 3)]) # Sin tier 4 -> tier 3
+            source = pygame.image.load(path)
+
+            # "base": el master más pequeño que cubre el tamaño máximo del tier
+            max_size = SpriteCache.bucket(size_for_power(TIER_MAX_POWER[tier], tier))
+            base = pygame.transform.smoothscale(source, (max_size, max_size))
+            images[f"{team}/{tier}/base"] = base
+
+            for size in sorted(sizes.get(tier, ())):
+                surf = pygame.transform.smoothscale(source, (size, size))
+                if team == "RED":
+                    surf = pygame.transform.flip(surf, True, False) # Igual que SpriteCache
+                images[f"{team}/{tier}/{size}"] = surf
+    return write_atlas(assets_dir, SOLDIER_ATLAS, images), len(images)
+
+def process(assets_dir, prune=False):
+    print(f"📦 {assets_dir}")
+    duplicates = find_duplicates(assets_dir)
+    for names in duplicates.values():
+        print(f"   duplicados: {names[0]} <- {', '.join(names[1:])}")
+
+    (w, h), count = build_soldier_atlas(assets_dir)
+    print(f"   {SOLDIER_ATLAS}: {count} sprites en {w}x{h}")
+
+    if prune:
+        for names in duplicates.values():
+            for name in names[1:]:
+                os.remove(os.path.join(assets_dir, name))
+                print(f"   🗑️ {name}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deduplica y empaqueta los assets en atlas pre-escalados")
+    parser.add_argument("dirs", nargs="*", default=[os.path.join(ANDROID_DIR, "assets"), os.path.join(ROOT, "assets")])
+    parser.add_argument("--prune", action="store_true", help="Borrar los PNG duplicados")
+    args = parser.parse_args(argv)
+
+    pygame.display.init()
+    for assets_dir in args.dirs:
+        process(assets_dir, args.prune)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
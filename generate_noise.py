@@ -0,0 +1,76 @@
+# --- GENERADOR DE NEBULOSA (offline) ---
+# Hornea con NumPy una textura de ruido fractal que tesela (los bordes casan
+# arriba/abajo e izquierda/derecha) y la guarda en dos formatos:
+#   nebula_noise.png  -> blanco con el ruido en el alfa (como la textura original)
+#   nebula_index.png  -> 8 bits indexado: el juego la anima cambiando la paleta
+#                        (scroll + ciclo de colores) sin trabajo por píxel
+# El juego no necesita NumPy: solo carga los PNG ya horneados.
+#
+#   python generate_noise.py                  # android_version/assets y assets/
+#   python generate_noise.py --seed 7 --octaves 6 ruta/a/assets
+import argparse
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import numpy as np
+import pygame
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ANDROID_DIR = os.path.join(ROOT, "android_version")
+
+NOISE_SIZE = (540, 960) # Media resolución; el juego la escala x2 al cargar
+NOISE_MAX_ALPHA = 64
+
+
+def tileable_noise(width, height, octaves=5, seed=0, base_cells=4, persistence=0.5):
+    """Ruido de valor fractal periódico en ambos ejes, normalizado a 0..1."""
+    rng = np.random.default_rng(seed)
+    out = np.zeros((height, width))
+    amplitude, cells = 1.0, base_cells
+    for _ in range(octaves):
+        gy, gx = cells, max(1, round(cells * width / height))
+        grid = rng.random((gy, gx))
+        ys, xs = np.arange(height) * gy / height, np.arange(width) * gx / width
+        y0, x0 = ys.astype(int), xs.astype(int)
+        ty, tx = ys - y0, xs - x0
+        ty, tx = ty * ty * (3 - 2 * ty), tx * tx * (3 - 2 * tx) # Smoothstep
+        y1, x1 = (y0 + 1) % gy, (x0 + 1) % gx # El % es lo que la hace teselable
+        top = grid[y0][:, x0] + (grid[y0][:, x1] - grid[y0][:, x0]) * tx
+        bottom = grid[y1][:, x0] + (grid[y1][:, x1] - grid[y1][:, x0]) * tx
+        out += (top + (bottom - top) * ty[:, None]) * amplitude
+        amplitude *= persistence
+        cells *= 2
+    out -= out.min()
+    out /= out.max()
+    return out ** 2 # Más contraste: nubes sobre fondo oscuro
+
+def write_noise(assets_dir, noise):
+    height, width = noise.shape
+    levels = (noise * 255).astype(np.uint8)
+
+    # Alfa sobre blanco (formato de la textura original)
+    alpha_surf = pygame.Surface((width, height), pygame.SRCALPHA)
+    alpha_surf.fill((255, 255, 255, 0))
+    pygame.surfarray.pixels_alpha(alpha_surf)[:] = (noise.T * NOISE_MAX_ALPHA).astype(np.uint8)
+    pygame.image.save(alpha_surf, os.path.join(assets_dir, "nebula_noise.png"))
+
+    # Indexado de 8 bits (surfarray va en x, y)
+    index_surf = pygame.surfarray.make_surface(levels.T.copy())
+    pygame.image.save(index_surf, os.path.join(assets_dir, "nebula_index.png"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hornea la textura de nebulosa (teselable)")
+    parser.add_argument("dirs", nargs="*", default=[os.path.join(ANDROID_DIR, "assets"), os.path.join(ROOT, "assets")])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--octaves", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    noise = tileable_noise(*NOISE_SIZE, octaves=args.octaves, seed=args.seed)
+    for assets_dir in args.dirs:
+        write_noise(assets_dir, noise)
+        print(f"🌌 {assets_dir}: nebula_noise.png + nebula_index.png {NOISE_SIZE[0]}x{NOISE_SIZE[1]}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
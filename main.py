@@ -1,13 +1,24 @@
 import asyncio
+import sys
 import pygame
 from TikTokLive import TikTokLiveClient
 from TikTokLive.events import GiftEvent, ConnectEvent, DisconnectEvent, JoinEvent, LikeEvent
 from game_engine import GameState
-from config import GIFT_MAP
+from frame_scheduler import FrameScheduler
+from event_queue import EventQueue
+from session_recorder import SessionRecorder, replay_session, replay_args, user_key
+from ingest_worker import IngestChannel
+from rooms import RoomMux, room_args
+from config import RECORD_SESSIONS, PROFILE_EXPORT_PATH, INGEST_PROCESS
 
-# Inicializar Juego (Global para que sea accesible)
-game = GameState()
+# Juego (global para que sea accesible); se crea en __main__, después de arrancar
+# el worker de ingesta si lo hay (GameState levanta los hilos de SDL y el mixer)
+game = None
+# Los handlers solo encolan; game_loop drena una vez por frame (máximo 50 minis por like)
+events = EventQueue(like_cap=50)
 client = None # Se definirá en el main
+channel = None # IngestChannel si TikTokLive corre en otro proceso (--ingest-process)
+mux = None # RoomMux si hay varias salas (--room usuario:EQUIPO, --fake-rooms N o config.ROOMS)
 
 # Debug Users para testing (rotan entre ellos)
 DEBUG_USERS = ["TestUser1", "TestUser2", "TestUser3", "TestUser4", "TestUser5", "TestUser6", "TestUser7", "TestUser8", "TestUser9", "TestUser10"]
@@ -27,39 +38,22 @@ async def on_disconnect(event: DisconnectEvent):
     print("❌ DESCONECTADO")
 
 async def on_join(event: JoinEvent):
-    # Audio
-    game.sound_manager.play("join")
-
-    # Asignar alternadamente entre equipos
     # Priorizar nickname (más amigable) sobre username
     display_name = getattr(event.user, 'nick_name', None) or getattr(event.user, 'username', "Unknown")
     
-    # Obtener siguiente equipo (alterna automáticamente)
-    team = game.get_next_join_team()
-    game.spawn_soldier(team, display_name, 1)  # Soldado básico (1 punto)
-    
-    # Log visual
-    color = (255, 150, 150) if team == "RED" else (150, 150, 255)
-    game.add_log(f"👋 {display_name} → {team}", color)
-    print(f"👋 {display_name} se unió → Equipo {team}")
+    # El equipo se asigna alternadamente al drenar la cola (el soldado se identifica por unique_id)
+    if events.push_join(display_name, uid=user_key(event)):
+        print(f"👋 {display_name} se unió")
+    else:
+        print(f"⚠️ Cola llena, join descartado: {display_name}")
 
 async def on_like(event: LikeEvent):
-    # Audio (un tick por batch de likes para no saturar)
-    game.sound_manager.play("tick")
-    
     like_count = getattr(event, 'likes', None) or getattr(event, 'total_likes', None) or getattr(event, 'count', 1) or 1
     user_name = getattr(event.user, 'nick_name', None) or getattr(event.user, 'username', "Alguien")
     
-    # Límite de seguridad para no crashear (máximo 50 por evento)
-    actual_count = min(int(like_count), 50)
-    
-    # Log visual
-    color = (255, 150, 150) if game.like_period_team == "RED" else (150, 150, 255)
-    game.add_log(f"👍 {user_name} +{actual_count} likes → {game.like_period_team}", color)
-    print(f"👍 {user_name} dio {like_count} like(s) → {actual_count} minis para {game.like_period_team}")
-    
-    for _ in range(actual_count):
-        game.spawn_like_soldier()
+    # Se acumulan por usuario y se spawnean según el presupuesto de cada frame
+    events.push_like(user_name, like_count, uid=user_key(event))
+    print(f"👍 {user_name} dio {like_count} like(s)")
 
 async def on_gift(event: GiftEvent):
     """Manejador de eventos de regalos"""
@@ -78,43 +72,37 @@ async def on_gift(event: GiftEvent):
     
     print(f"🎁 Recibido: {gift_name} de {display_name}")
     
-    # Buscar el regalo en nuestro mapa de config
-    game_data = None
-    
-    # Búsqueda flexible (por si el regalo se llama "Rose" o "Sending Rose")
-    for key, val in GIFT_MAP.items():
-        if key.lower() in gift_name.lower():
-            game_data = val
-            break
+    # Buscar el regalo (por id o nombre) y encolarlo (los combos duplicados se descartan)
+    streak_key = getattr(event, 'group_id', None) or None
+    game_data = events.push_gift(display_name, gift_name, streak_key, getattr(event.gift, 'id', None),
+                                 uid=user_key(event))
             
     if game_data:
-        # Audio
-        game.sound_manager.play("gift")
-        
         points, team = game_data
-        # Log visual
-        color = (255, 150, 150) if team == "RED" else (150, 150, 255)
-        if team == "RESET":
-            color = (255, 100, 255)  # Magenta para Galaxy
-            game.add_log(f"🌌 GALAXY RESET por {display_name}!", color)
-        else:
-            game.add_log(f"🎁 {display_name}: {gift_name} +{points}pts → {team}", color)
         print(f"   -> Acción: {points} pts para {team}")
-        game.spawn_soldier(team, display_name, points)
     else:
         print(f"   -> Regalo no configurado (Sin efecto)")
 
 async def game_loop():
     """Mantiene vivo el juego de Pygame"""
     print("🎮 Ventana de juego abierta. Esperando conexión a TikTok...")
+    scheduler = FrameScheduler()
     running = True
     while running:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+                if PROFILE_EXPORT_PATH:
+                    game.profiler.export(PROFILE_EXPORT_PATH)
+                if game.exporter:
+                    game.exporter.close() # Cierra ffmpeg / el fichero de frames
                 # client.stop() no existe en versiones recientes o es disconnect
                 if client and client.connected:
                     await client.disconnect()
+                if channel:
+                    channel.stop()
+                if mux:
+                    await mux.disconnect()
 
             # Debug Keys - Simular diferentes regalos
             if event.type == pygame.KEYDOWN:
@@ -173,9 +161,15 @@ async def game_loop():
                 elif event.key == pygame.K_x: # X = Galaxy (RESET)
                     print("🔧 Debug: Galaxy (RESET)")
                     game.spawn_soldier("RESET", "Galaxy", 9999)
+                
+                elif event.key == pygame.K_p: # P = Profiler (tiempos por fase en pantalla)
+                    game.profiler.toggle_overlay()
         
-        game.run_frame()
-        await asyncio.sleep(0.001) # Ceder control a TikTokLive
+        game.run_frame(events) # Drena la cola de eventos y dibuja
+        if game.governor and scheduler.fps != game.governor.fps:
+            scheduler.set_fps(game.governor.fps) # El gobernador de calidad baja/sube el FPS objetivo
+        await scheduler.wait_next_frame() # Ceder control a TikTokLive hasta el próximo frame
+        game.profiler.gauge("dropped_frames", scheduler.dropped_frames)
     
     pygame.quit()
 
@@ -183,41 +177,84 @@ if __name__ == '__main__':
     print("--- ⚔️ GUERRA DE COLORES ⚔️ ---")
     print("--- ⚔️ GUERRA DE COLORES ⚔️ ---")
     
-    # Configuración de usuario por defecto para Android/Testing
-    DEFAULT_USER = "alkasstvsports" # Cambia esto si lo usas en Android
+    # Reproducir una sesión grabada sin red: python main.py --replay sesion.jsonl --speed 4 (0 = sin límite)
+    replay_path, replay_speed = replay_args(sys.argv)
+    handlers = {"gift": on_gift, "connect": on_connect, "disconnect": on_disconnect,
+                "join": on_join, "like": on_like}
+    # Ingesta en otro proceso: python main.py --ingest-process [--replay sesion.jsonl]
+    use_ingest_process = INGEST_PROCESS or "--ingest-process" in sys.argv
+    # Multi-room: python main.py --room creador_a:RED --room creador_b:BLUE
+    rooms, fake_rooms = room_args(sys.argv)
     
-    try:
-        user_input = input(f"Introduce el usuario de TikTok (Enter para '{DEFAULT_USER}'): ").strip()
-        if not user_input:
+    if rooms:
+        mux = RoomMux(rooms)
+        sources = mux.fake_sources(seconds=600) if fake_rooms else mux.live_sources()
+    elif use_ingest_process and replay_path:
+        channel = IngestChannel(replay_path=replay_path, replay_speed=replay_speed).start()
+        source = channel.feed(events, handlers)
+    elif replay_path:
+        source = replay_session(replay_path, handlers, replay_speed)
+    else:
+        # Configuración de usuario por defecto para Android/Testing
+        DEFAULT_USER = "alkasstvsports" # Cambia esto si lo usas en Android
+        
+        try:
+            user_input = input(f"Introduce el usuario de TikTok (Enter para '{DEFAULT_USER}'): ").strip()
+            if not user_input:
+                user_input = DEFAULT_USER
+        except EOFError:
+            print(f"⚠️ Entorno no interactivo detectado (Android?). Usando: {DEFAULT_USER}")
             user_input = DEFAULT_USER
-    except EOFError:
-        print(f"⚠️ Entorno no interactivo detectado (Android?). Usando: {DEFAULT_USER}")
-        user_input = DEFAULT_USER
-    
-    # Limpiar @ si el usuario lo puso
-    if user_input.startswith("@"):
-        user_input = user_input[1:]
         
-    print(f"Conectando con: @{user_input} ...")
-    
-    # Crear cliente dinámicamente
-    client = TikTokLiveClient(unique_id=user_input)
+        # Limpiar @ si el usuario lo puso
+        if user_input.startswith("@"):
+            user_input = user_input[1:]
+            
+        print(f"Conectando con: @{user_input} ...")
+        
+        if use_ingest_process:
+            # El worker es dueño del cliente; aquí solo llegan registros compactos
+            channel = IngestChannel(unique_id=user_input).start()
+            source = channel.feed(events, handlers)
+        else:
+            # Crear cliente dinámicamente
+            client = TikTokLiveClient(unique_id=user_input)
+        
+            # Grabar la sesión (config.RECORD_SESSIONS) para poder reproducirla después
+            recorder = SessionRecorder() if RECORD_SESSIONS else None
+            if recorder:
+                print(f"⏺️ Grabando sesión en {recorder.path}")
+        
+            def listen(event_type, kind):
+                handler = handlers[kind]
+                if recorder and kind != "disconnect":
+                    handler = recorder.wrap(kind, handler)
+                client.add_listener(event_type, handler)
+        
+            # Registrar evento manualmente
+            listen(GiftEvent, "gift")
+            listen(ConnectEvent, "connect")
+            listen(DisconnectEvent, "disconnect")
+            listen(JoinEvent, "join")
+            listen(LikeEvent, "like")  # Likes = Mini soldados
+            source = client.start()
     
-    # Registrar evento manualmente
-    client.add_listener(GiftEvent, on_gift)
-    client.add_listener(ConnectEvent, on_connect)
-    client.add_listener(DisconnectEvent, on_disconnect)
-    client.add_listener(JoinEvent, on_join)
-    client.add_listener(LikeEvent, on_like)  # Likes = Mini soldados
+    game = GameState()
+    if mux is not None:
+        source = mux.run(events, sources, game)
     
     # Iniciar conexión
     loop = asyncio.get_event_loop()
     
     try:
-        future = asyncio.gather(client.start(), game_loop())
+        future = asyncio.gather(source, game_loop())
         loop.run_until_complete(future)
     except KeyboardInterrupt:
         pass
     except Exception as e:
         print(f"❌ Error: {e}")
-        print("💡 Consejo: Verifica que el usuario esté en vivo.")
\ No newline at end of file
+        print("💡 Consejo: Verifica que el usuario esté en vivo.")
+    finally:
+        # Ctrl-C es la única salida con la ventana oculta de la exportación: ffmpeg tiene que cerrar el fichero/stream
+        if game.exporter:
+            game.exporter.close()
\ No newline at end of file